@@ -1,3 +1,12 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
 class APTModel:
     def __init__(self, risk_free_rate, factors):
         """
@@ -28,6 +37,349 @@ class APTModel:
                 print(f"Warning: Factor '{factor}' not found in the model factors.")
         return ret
 
+    def premium_vector(self, factor_names):
+        """
+        Align the model's risk premiums to an ordered list of factor names.
+
+        Parameters:
+            factor_names (list): Factor names in the column order of a beta matrix.
+
+        Returns:
+            tuple: (numpy.ndarray of premiums, with 0 for unknown factors,
+            list of factor names not found in the model factors).
+        """
+        premiums = np.array([self.factors.get(name, 0.0) for name in factor_names], dtype=np.float64)
+        unknown = [name for name in factor_names if name not in self.factors]
+        return premiums, unknown
+
+    def expected_returns(self, betas, factor_names=None):
+        """
+        Calculate expected returns for many assets with one matrix-vector product.
+
+        Parameters:
+            betas (numpy.ndarray or pandas.DataFrame): Asset betas with shape
+                (assets x factors). A DataFrame's columns are used as factor names.
+            factor_names (list, optional): Factor names for the columns of a
+                NumPy beta matrix. Defaults to the model's factor order.
+
+        Returns:
+            numpy.ndarray or pandas.Series: Expected returns per asset, as a
+            Series indexed like the DataFrame when one is given.
+        """
+        if isinstance(betas, pd.DataFrame):
+            factor_names = list(betas.columns)
+            beta_matrix = betas.to_numpy(dtype=np.float64)
+        else:
+            beta_matrix = np.asarray(betas, dtype=np.float64)
+            if factor_names is None:
+                factor_names = list(self.factors)
+        if beta_matrix.ndim != 2 or beta_matrix.shape[1] != len(factor_names):
+            raise ValueError("betas must have shape (assets, factors) matching the factor names")
+
+        premiums, unknown = self.premium_vector(factor_names)
+        if unknown:
+            print(f"Warning: {len(unknown)} factor(s) not found in the model factors and ignored "
+                  f"for {beta_matrix.shape[0]} assets: {', '.join(map(str, unknown))}")
+
+        returns = self.risk_free_rate + beta_matrix @ premiums
+        if isinstance(betas, pd.DataFrame):
+            return pd.Series(returns, index=betas.index, name='expected_return')
+        return returns
+
+
+def estimate_betas(asset_returns, factor_returns, asset_names=None, factor_names=None):
+    """
+    Estimate factor betas for every asset with a single least-squares solve.
+
+    Each asset's returns are regressed on the factor returns plus an
+    intercept. All assets share the same design matrix, so their return
+    series are stacked as columns and solved together.
+
+    Parameters:
+        asset_returns (numpy.ndarray or pandas.DataFrame): Returns with shape (periods x assets).
+        factor_returns (numpy.ndarray or pandas.DataFrame): Returns with shape (periods x factors).
+        asset_names (list, optional): Asset names, taken from DataFrame columns if omitted.
+        factor_names (list, optional): Factor names, taken from DataFrame columns if omitted.
+
+    Returns:
+        tuple: (betas as a pandas.DataFrame of shape (assets x factors),
+        alphas as a pandas.Series indexed by asset).
+    """
+    if asset_names is None and isinstance(asset_returns, pd.DataFrame):
+        asset_names = list(asset_returns.columns)
+    if factor_names is None and isinstance(factor_returns, pd.DataFrame):
+        factor_names = list(factor_returns.columns)
+    Y = np.asarray(asset_returns, dtype=np.float64)
+    F = np.asarray(factor_returns, dtype=np.float64)
+    if Y.shape[0] != F.shape[0]:
+        raise ValueError("asset and factor returns must cover the same periods")
+
+    X = np.column_stack([np.ones(F.shape[0]), F])
+    coefficients, *_ = np.linalg.lstsq(X, Y, rcond=None)
+
+    betas = pd.DataFrame(coefficients[1:].T, index=asset_names, columns=factor_names)
+    alphas = pd.Series(coefficients[0], index=asset_names, name='alpha')
+    return betas, alphas
+
+
+class RollingBetaEstimator:
+    def __init__(self, window, num_factors, num_assets, refresh_every=250):
+        """
+        Rolling-window factor betas updated incrementally as new periods arrive.
+
+        The estimator keeps the normal equations of the regression on the last
+        `window` periods. Each new period is a rank-one update and each dropped
+        period a rank-one downdate of the inverse Gram matrix (Sherman-Morrison),
+        so a daily update costs O(factors^2 x assets) instead of a full refit.
+
+        Parameters:
+            window (int): Number of periods in the regression window.
+            num_factors (int): Number of factors.
+            num_assets (int): Number of assets.
+            refresh_every (int): Recompute the inverse from scratch after this
+                many updates to stop rounding errors from accumulating.
+        """
+        if window <= num_factors + 1:
+            raise ValueError("window must be longer than the number of factors plus one")
+        self.window = window
+        self.num_factors = num_factors
+        self.num_assets = num_assets
+        self.refresh_every = refresh_every
+        self._x = np.zeros((window, num_factors + 1))
+        self._y = np.zeros((window, num_assets))
+        self._count = 0
+        self._gram = np.zeros((num_factors + 1, num_factors + 1))
+        self._gram_inv = None
+        self._xty = np.zeros((num_factors + 1, num_assets))
+        self._since_refresh = 0
+
+    def _rank_one(self, x, sign):
+        # Sherman-Morrison update of the inverse for gram += sign * x x^T
+        gx = self._gram_inv @ x
+        self._gram_inv -= sign * np.outer(gx, gx) / (1.0 + sign * (x @ gx))
+
+    def update(self, asset_returns, factor_returns):
+        """
+        Add one period of returns, dropping the oldest period once the window is full.
+
+        Parameters:
+            asset_returns (array_like): Returns of every asset for the period.
+            factor_returns (array_like): Returns of every factor for the period.
+
+        Returns:
+            numpy.ndarray or None: Current betas with shape (assets x factors),
+            or None until the window has filled.
+        """
+        x = np.concatenate([[1.0], np.asarray(factor_returns, dtype=np.float64)])
+        y = np.asarray(asset_returns, dtype=np.float64)
+        slot = self._count % self.window
+
+        if self._count >= self.window:
+            old_x, old_y = self._x[slot].copy(), self._y[slot]
+            self._gram -= np.outer(old_x, old_x)
+            self._xty -= np.outer(old_x, old_y)
+        self._gram += np.outer(x, x)
+        self._xty += np.outer(x, y)
+        self._x[slot], self._y[slot] = x, y
+        self._count += 1
+
+        if self._count < self.window:
+            return None
+
+        if self._gram_inv is None or self._since_refresh >= self.refresh_every:
+            self._gram_inv = np.linalg.inv(self._gram)
+            self._since_refresh = 0
+        else:
+            self._rank_one(old_x, -1.0)
+            self._rank_one(x, 1.0)
+            self._since_refresh += 1
+        return self.betas()
+
+    def betas(self):
+        """
+        Return the betas of the current window.
+
+        Returns:
+            numpy.ndarray: Betas with shape (assets x factors).
+        """
+        if self._gram_inv is None:
+            raise ValueError("the window has not filled yet")
+        return (self._gram_inv @ self._xty)[1:].T
+
+
+def rolling_betas(asset_returns, factor_returns, window, refresh_every=250):
+    """
+    Yield rolling-window betas for every period once the window has filled.
+
+    Parameters:
+        asset_returns (numpy.ndarray or pandas.DataFrame): Returns with shape (periods x assets).
+        factor_returns (numpy.ndarray or pandas.DataFrame): Returns with shape (periods x factors).
+        window (int): Number of periods in the regression window.
+        refresh_every (int): Passed to RollingBetaEstimator.
+
+    Yields:
+        tuple: (period index, numpy.ndarray of betas with shape (assets x factors)).
+    """
+    Y = np.asarray(asset_returns, dtype=np.float64)
+    F = np.asarray(factor_returns, dtype=np.float64)
+    estimator = RollingBetaEstimator(window, F.shape[1], Y.shape[1], refresh_every)
+    for t in range(Y.shape[0]):
+        betas = estimator.update(Y[t], F[t])
+        if betas is not None:
+            yield t, betas
+
+
+def _detect_format(path, file_format):
+    """Return the input/output format from an explicit option or the file extension."""
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    formats = {'csv': 'csv', 'txt': 'csv', 'parquet': 'parquet', 'pq': 'parquet', 'jsonl': 'jsonl', 'json': 'jsonl'}
+    if extension not in formats:
+        raise ValueError(f"Cannot infer the format of '{path}', pass --format")
+    return formats[extension]
+
+
+def read_chunks(path, file_format=None, chunk_size=100_000):
+    """
+    Stream a CSV, Parquet or JSONL file in DataFrame chunks of bounded size.
+
+    Parameters:
+        path (str): File path, or '-' to read CSV/JSONL from stdin.
+        file_format (str, optional): 'csv', 'parquet' or 'jsonl'. Inferred
+            from the extension when omitted; required for stdin.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of rows.
+    """
+    source = sys.stdin if path == '-' else path
+    if path == '-' and not file_format:
+        raise ValueError("--format is required when reading from stdin")
+    file_format = _detect_format(path, file_format)
+
+    if file_format == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_size)
+    elif file_format == 'jsonl':
+        yield from pd.read_json(source, lines=True, chunksize=chunk_size)
+    elif file_format == 'parquet':
+        if path == '-':
+            raise ValueError("Parquet input cannot be streamed from stdin")
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'")
+
+
+def load_factors(path, file_format=None):
+    """
+    Read factor risk premiums from a file with 'factor' and 'premium' columns.
+
+    Parameters:
+        path (str): CSV, Parquet or JSONL file.
+        file_format (str, optional): Format override.
+
+    Returns:
+        dict: Factor names mapped to their risk premiums.
+    """
+    factors = pd.concat(read_chunks(path, file_format), ignore_index=True)
+    return dict(zip(factors['factor'].astype(str), factors['premium'].astype(float)))
+
+
+def iter_expected_returns(apt_model, chunks, id_column='asset'):
+    """
+    Score streamed chunks of asset betas with the APT model.
+
+    Factor columns are aligned with the model's premiums once, on the first
+    chunk, and unknown factors are reported a single time.
+
+    Parameters:
+        apt_model (APTModel): The model to score with.
+        chunks (iterable of pandas.DataFrame): Beta rows, one column per factor
+            plus an optional asset identifier column.
+        id_column (str): Name of the asset identifier column.
+
+    Yields:
+        pandas.DataFrame: Asset identifiers (when present) and expected returns per chunk.
+    """
+    factor_names = premiums = None
+    for chunk in chunks:
+        if factor_names is None:
+            factor_names = [c for c in chunk.columns if c != id_column]
+            premiums, unknown = apt_model.premium_vector(factor_names)
+            if unknown:
+                print(f"Warning: {len(unknown)} factor(s) not found in the model factors and ignored: "
+                      f"{', '.join(map(str, unknown))}", file=sys.stderr)
+
+        returns = apt_model.risk_free_rate + chunk[factor_names].to_numpy(dtype=np.float64) @ premiums
+        result = pd.DataFrame({'expected_return': returns}, index=chunk.index)
+        if id_column in chunk.columns:
+            result.insert(0, id_column, chunk[id_column].to_numpy())
+        yield result
+
+
+def run_batch(risk_free_rate, factors_path, betas_path, output_path='-', input_format=None,
+              output_format=None, chunk_size=100_000, id_column='asset'):
+    """
+    Score a file or stdin stream of asset betas and write expected returns incrementally.
+
+    Only one chunk of rows is held in memory at a time. Throughput is
+    reported on stderr so it does not mix with results written to stdout.
+
+    Parameters:
+        risk_free_rate (float): The risk free rate.
+        factors_path (str): File of factor premiums, see load_factors.
+        betas_path (str): File of asset betas, or '-' for stdin.
+        output_path (str): Output file, or '-' for stdout.
+        input_format (str, optional): Format of the betas input.
+        output_format (str, optional): 'csv' or 'jsonl'. Inferred from the
+            output extension, CSV for stdout.
+        chunk_size (int): Rows per chunk.
+        id_column (str): Name of the asset identifier column.
+
+    Returns:
+        int: Number of assets scored.
+    """
+    apt_model = APTModel(risk_free_rate, load_factors(factors_path))
+    output_format = output_format or ('csv' if output_path == '-' else _detect_format(output_path, None))
+    if output_format not in ('csv', 'jsonl'):
+        raise ValueError("Expected returns can be written as 'csv' or 'jsonl'")
+
+    rows = 0
+    start = time.perf_counter()
+    out = sys.stdout if output_path == '-' else open(output_path, 'w', newline='')
+    try:
+        chunks = read_chunks(betas_path, input_format, chunk_size)
+        for result in iter_expected_returns(apt_model, chunks, id_column):
+            if output_format == 'csv':
+                result.to_csv(out, index=False, header=rows == 0)
+            else:
+                out.write(result.to_json(orient='records', lines=True, double_precision=15).rstrip('\n') + '\n')
+            rows += len(result)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} assets in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)", file=sys.stderr)
+    return rows
+
+
+def parse_args(argv=None):
+    """Parse the command line options of the batch mode."""
+    parser = argparse.ArgumentParser(
+        description="Arbitrage Pricing Theory expected returns. Without arguments the model runs interactively.")
+    parser.add_argument('--risk-free-rate', type=float, required=True, help="Risk free rate, e.g. 0.02 for 2%%.")
+    parser.add_argument('--factors', required=True, help="CSV/Parquet/JSONL file with 'factor' and 'premium' columns.")
+    parser.add_argument('--betas', default='-', help="CSV/Parquet/JSONL file of asset betas, '-' for stdin.")
+    parser.add_argument('--output', default='-', help="Output CSV/JSONL file, '-' for stdout.")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'jsonl'], help="Format of the betas input.")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help="Format of the output.")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows processed per chunk.")
+    parser.add_argument('--id-column', default='asset', help="Asset identifier column in the betas input.")
+    return parser.parse_args(argv)
+
 
 def main():
     # Input the risk free rate.
@@ -60,4 +412,9 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        args = parse_args()
+        run_batch(args.risk_free_rate, args.factors, args.betas, args.output, args.format,
+                  args.output_format, args.chunk_size, args.id_column)
+    else:
+        main()
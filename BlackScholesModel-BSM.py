@@ -1,8 +1,76 @@
 import math
-from math import log, sqrt, exp
+import sys
+import threading
+import time
+from collections import OrderedDict
+from math import log, sqrt, exp, erf
+import numpy as np
+from scipy.special import ndtr
 from scipy.stats import norm
 
 
+# Abramowitz & Stegun 26.2.17 coefficients, max absolute error 7.5e-8
+_AS_P = 0.2316419
+_AS_B = (0.319381530, -0.356563782, 1.781477937, -1.821255978, 1.330274429)
+_INV_SQRT_2PI = 1.0 / sqrt(2.0 * math.pi)
+
+
+def _erf_cdf(x):
+    """Standard normal CDF of a scalar through math.erf."""
+    return 0.5 * (1.0 + erf(x / sqrt(2.0)))
+
+
+def _poly_cdf(x):
+    """
+    Standard normal CDF through the Abramowitz & Stegun polynomial approximation.
+
+    Works on scalars and arrays. The maximum absolute error is 7.5e-8, which
+    is below a hundredth of a cent on a 100-dollar underlying.
+    """
+    scalar = isinstance(x, (float, int))
+    a = abs(x) if scalar else np.abs(x)
+    t = 1.0 / (1.0 + _AS_P * a)
+    poly = t * (_AS_B[0] + t * (_AS_B[1] + t * (_AS_B[2] + t * (_AS_B[3] + t * _AS_B[4]))))
+    if scalar:
+        upper = 1.0 - _INV_SQRT_2PI * exp(-0.5 * a * a) * poly
+        return upper if x >= 0 else 1.0 - upper
+    upper = 1.0 - _INV_SQRT_2PI * np.exp(-0.5 * a * a) * poly
+    return np.where(x >= 0, upper, 1.0 - upper)
+
+
+# Available normal CDF backends: name -> (function, works on arrays)
+NORMAL_CDF_BACKENDS = {
+    'erf': (_erf_cdf, False),
+    'ndtr': (ndtr, True),
+    'poly': (_poly_cdf, True),
+    'scipy': (norm.cdf, True),
+}
+
+_scalar_cdf = _erf_cdf
+_array_cdf = ndtr
+
+
+def set_normal_cdf_backend(scalar=None, array=None):
+    """
+    Select the normal CDF implementations used by the pricing functions.
+
+    Parameters:
+    scalar : str, optional
+        Backend used by black_scholes: 'erf' (default), 'ndtr', 'poly' or 'scipy'.
+    array : str, optional
+        Backend used by the batch functions: 'ndtr' (default), 'poly' or 'scipy'.
+    """
+    global _scalar_cdf, _array_cdf
+    if scalar is not None:
+        if scalar not in NORMAL_CDF_BACKENDS:
+            raise ValueError(f"Unknown normal CDF backend '{scalar}'")
+        _scalar_cdf = NORMAL_CDF_BACKENDS[scalar][0]
+    if array is not None:
+        if array not in NORMAL_CDF_BACKENDS or not NORMAL_CDF_BACKENDS[array][1]:
+            raise ValueError(f"Normal CDF backend '{array}' does not support arrays")
+        _array_cdf = NORMAL_CDF_BACKENDS[array][0]
+
+
 def black_scholes(S, K, T, r, sigma, option_type='call'):
     """
     Calculate the Black-Scholes-Merton option price.
@@ -30,24 +98,491 @@ def black_scholes(S, K, T, r, sigma, option_type='call'):
     d2 = d1 - sigma * sqrt(T)
 
     if option_type.lower() == 'call':
-        option_price = S * norm.cdf(d1) - K * exp(-r * T) * norm.cdf(d2)
+        option_price = S * _scalar_cdf(d1) - K * exp(-r * T) * _scalar_cdf(d2)
     elif option_type.lower() == 'put':
-        option_price = K * exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+        option_price = K * exp(-r * T) * _scalar_cdf(-d2) - S * _scalar_cdf(-d1)
     else:
         raise ValueError("option_type must be either 'call' or 'put'")
 
     return option_price
 
 
-# Example usage:
-S = 100  # Current asset price
-K = 100  # Strike price
-T = 1  # Time to maturity in years
-r = 0.05  # Risk-free interest rate (5% for .05)
-sigma = 0.2  # Volatility (20% for .2)
+def _call_mask(option_type):
+    """
+    Convert an option type specification into a boolean call mask.
+
+    Parameters:
+    option_type : str or array_like
+        'call'/'put', an array of 'call'/'put' strings, or a boolean array
+        where True marks a call.
+
+    Returns:
+    numpy.ndarray
+        Boolean array, True where the contract is a call. It takes part in
+        broadcasting with the numeric inputs.
+    """
+    if isinstance(option_type, str):
+        kind = option_type.lower()
+        if kind not in ('call', 'put'):
+            raise ValueError("option_type must be either 'call' or 'put'")
+        return np.asarray(kind == 'call')
+
+    option_type = np.asarray(option_type)
+    if option_type.dtype == bool:
+        return option_type
+
+    kinds = np.char.lower(option_type.astype(str))
+    if not np.all((kinds == 'call') | (kinds == 'put')):
+        raise ValueError("option_type must be either 'call' or 'put'")
+    return kinds == 'call'
+
+
+def _norm_pdf(x):
+    """Standard normal pdf, only needed by the Greeks and the implied volatility solver."""
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _bsm_terms(S, K, T, r, sigma, option_type='call'):
+    """
+    Compute the intermediates shared by the batch price and Greeks.
+
+    Only what the price needs is computed here, so the pricing hot path
+    does not pay for the Greeks; callers needing the pdf use _norm_pdf.
+
+    Parameters:
+    S, K, T, r, sigma : float or array_like
+        Same meaning as in black_scholes.
+    option_type : str or array_like, optional
+        Same meaning as in black_scholes_batch. Default is 'call'.
+
+    Returns:
+    dict
+        Broadcast float64 inputs and call mask together with d1, d2, the
+        discounted strike, the standard normal cdf values and the price of
+        each contract as a call or put.
+    """
+    is_call, S, K, T, r, sigma = np.broadcast_arrays(
+        _call_mask(option_type), *(np.asarray(x, dtype=np.float64) for x in (S, K, T, r, sigma)))
+
+    # Calculate d1 and d2 using the Black-Scholes formulas, in place where possible
+    sqrt_t = np.sqrt(T)
+    sig_sqrt_t = sigma * sqrt_t
+    d1 = np.log(S / K)
+    d1 += (r + 0.5 * sigma * sigma) * T
+    d1 /= sig_sqrt_t
+    d2 = d1 - sig_sqrt_t
+    discounted_k = K * np.exp(-r * T)
+    cdf_d1 = _array_cdf(d1)
+    cdf_d2 = _array_cdf(d2)
+
+    # Call prices, turned into put prices through put-call parity only where needed
+    price = np.asarray(S * cdf_d1)
+    price -= discounted_k * cdf_d2
+    if not is_call.all():
+        np.add(price, discounted_k - S, out=price, where=~is_call)
+
+    return {'is_call': is_call, 'S': S, 'K': K, 'T': T, 'r': r, 'sigma': sigma, 'sqrt_t': sqrt_t,
+            'd1': d1, 'd2': d2, 'discounted_k': discounted_k, 'cdf_d1': cdf_d1, 'cdf_d2': cdf_d2,
+            'price': price}
+
+
+def black_scholes_batch(S, K, T, r, sigma, option_type='call', dtype=np.float64):
+    """
+    Price many options with the Black-Scholes-Merton formula in one vectorized pass.
+
+    All numeric inputs are broadcast against each other, so a scalar rate or
+    volatility can be combined with arrays of strikes and maturities.
+
+    Parameters:
+    S, K, T, r, sigma : float or array_like
+        Same meaning as in black_scholes.
+    option_type : str or array_like, optional
+        'call' or 'put' for the whole batch, an array of 'call'/'put' strings,
+        or a boolean mask where True marks a call. Default is 'call'.
+    dtype : numpy dtype, optional
+        Output dtype, e.g. np.float32 to halve the memory of the result.
+        Computation is always done in float64. Default is np.float64.
+
+    Returns:
+    numpy.ndarray
+        Option prices with the broadcast shape of the inputs.
+    """
+    option_price = _bsm_terms(S, K, T, r, sigma, option_type)['price']
+
+    return option_price.astype(dtype, copy=False)
+
+
+def black_scholes_greeks(S, K, T, r, sigma, option_type='call', dtype=np.float64):
+    """
+    Price options and compute their analytic Greeks in one vectorized pass.
+
+    Parameters:
+    S, K, T, r, sigma : float or array_like
+        Same meaning as in black_scholes.
+    option_type : str or array_like, optional
+        Same meaning as in black_scholes_batch. Default is 'call'.
+    dtype : numpy dtype, optional
+        Output dtype of every returned array. Default is np.float64.
+
+    Returns:
+    dict
+        Arrays keyed by 'price', 'delta', 'gamma', 'vega', 'theta', 'rho',
+        'vanna' and 'volga'. Vega, vanna and volga are per unit of volatility,
+        theta is per year and rho is per unit of rate.
+    """
+    t = _bsm_terms(S, K, T, r, sigma, option_type)
+    is_call, S, T, r, sigma, sqrt_t = t['is_call'], t['S'], t['T'], t['r'], t['sigma'], t['sqrt_t']
+    d1, d2, discounted_k = t['d1'], t['d2'], t['discounted_k']
+    pdf_d1 = _norm_pdf(d1)
+
+    # Sensitivities shared by calls and puts
+    gamma = pdf_d1 / (S * sigma * sqrt_t)
+    vega = S * pdf_d1 * sqrt_t
+    vanna = -pdf_d1 * d2 / sigma
+    volga = vega * d1 * d2 / sigma
+
+    # Call Greeks, with the put versions obtained from put-call parity
+    call_delta = t['cdf_d1']
+    call_theta = -S * pdf_d1 * sigma / (2 * sqrt_t) - r * discounted_k * t['cdf_d2']
+    call_rho = T * discounted_k * t['cdf_d2']
+
+    greeks = {
+        'price': t['price'],
+        'delta': np.where(is_call, call_delta, call_delta - 1),
+        'gamma': gamma,
+        'vega': vega,
+        'theta': np.where(is_call, call_theta, call_theta + r * discounted_k),
+        'rho': np.where(is_call, call_rho, call_rho - T * discounted_k),
+        'vanna': vanna,
+        'volga': volga,
+    }
+    return {name: value.astype(dtype, copy=False) for name, value in greeks.items()}
+
+
+def price_option_chain(chain, dtype=np.float64):
+    """
+    Price an option chain stored in a DataFrame.
+
+    Parameters:
+    chain : pandas.DataFrame
+        Must contain the columns 'S', 'K', 'T', 'r', 'sigma' and 'option_type'.
+    dtype : numpy dtype, optional
+        Output dtype. Default is np.float64.
+
+    Returns:
+    numpy.ndarray
+        Option prices aligned with the rows of the chain.
+    """
+    return black_scholes_batch(chain['S'].to_numpy(), chain['K'].to_numpy(), chain['T'].to_numpy(),
+                               chain['r'].to_numpy(), chain['sigma'].to_numpy(),
+                               option_type=chain['option_type'].to_numpy(), dtype=dtype)
+
+
+def implied_volatility(price, S, K, T, r, option_type='call', iterations=6, min_sigma=1e-4, max_sigma=5.0,
+                       tol=1e-4):
+    """
+    Solve for Black-Scholes implied volatility on many quotes at once.
+
+    Every quote is reduced to its time value, the price of the out-of-the-money
+    option with the same strike, through put-call parity. The Corrado-Miller
+    rational approximation gives the starting point, which is then refined
+    by a fixed number of batched Halley steps on the log of the time value,
+    which converge on deep out-of-the-money quotes where steps on the price
+    itself stall.
+
+    Parameters:
+    price : float or array_like
+        Observed option prices.
+    S, K, T, r : float or array_like
+        Same meaning as in black_scholes.
+    option_type : str or array_like, optional
+        Same meaning as in black_scholes_batch. Default is 'call'.
+    iterations : int, optional
+        Number of Halley steps applied to every quote. Default is 6.
+    min_sigma, max_sigma : float, optional
+        Bounds the volatility is clipped to after every step.
+    tol : float, optional
+        Relative error on the time value a solution may leave, both after
+        the last step and from the floating-point resolution of the quote.
+        Default is 1e-4.
+
+    Returns:
+    numpy.ndarray
+        Implied volatilities, NaN where the quote violates the no-arbitrage
+        bounds max(S - K*exp(-rT), 0) < call price < S, where its time value
+        is too small against S and K to determine a volatility, or where the
+        solver did not converge within tol.
+    """
+    is_call, price, S, K, T, r = np.broadcast_arrays(
+        _call_mask(option_type), *(np.asarray(x, dtype=np.float64) for x in (price, S, K, T, r)))
+    discounted_k = K * np.exp(-r * T)
+    call_price = np.where(is_call, price, price + S - discounted_k)
+
+    # Mask quotes outside the no-arbitrage bounds
+    valid = (call_price > np.maximum(S - discounted_k, 0.0)) & (call_price < S) & (T > 0)
+
+    # Time value of every quote, priced as the out-of-the-money call or put
+    otm_call = S <= discounted_k
+    time_value = call_price - np.maximum(S - discounted_k, 0.0)
+    log_time_value = np.log(np.where(valid, time_value, 1.0))
+
+    # Corrado-Miller initial guess, with a negative discriminant floored at zero
+    half_gap = call_price - 0.5 * (S - discounted_k)
+    disc = np.maximum(half_gap ** 2 - (S - discounted_k) ** 2 / np.pi, 0.0)
+    sigma = np.sqrt(2 * np.pi / T) / (S + discounted_k) * (half_gap + np.sqrt(disc))
+    sigma = np.clip(np.where(valid, sigma, 0.2), min_sigma, max_sigma)
+
+    for _ in range(iterations):
+        t = _bsm_terms(S, K, T, r, sigma, otm_call)
+        model = np.maximum(t['price'], 1e-300)
+        # f = log(model) - log(time value), with f' = vega / model and
+        # f'' = volga / model - f'**2
+        f = np.log(model) - log_time_value
+        g = S * _norm_pdf(t['d1']) * t['sqrt_t'] / model
+        # Halley step, falling back to Newton where the correction overflows or degenerates
+        with np.errstate(over='ignore', invalid='ignore'):
+            h = g * t['d1'] * t['d2'] / sigma - g * g
+            denom = g - 0.5 * f * h / np.where(g > 0, g, 1.0)
+            step = f / np.where(np.abs(denom) > 1e-300, denom, np.where(g > 0, g, np.inf))
+        sigma = np.clip(sigma - step, min_sigma, max_sigma)
+
+    # A time value below the rounding error of S and K carries no volatility
+    # information, and quotes still not matched after the fixed steps are
+    # masked rather than returned as if solved
+    resolved = time_value * tol > np.finfo(np.float64).eps * (S + discounted_k)
+    residual = np.abs(_bsm_terms(S, K, T, r, sigma, otm_call)['price'] - time_value)
+    converged = valid & resolved & (residual <= tol * time_value)
+    return np.where(converged, sigma, np.nan)
+
+
+def benchmark_implied_volatility(n=1_000_000, iterations=6):
+    """
+    Report the throughput of implied_volatility in quotes per second.
+
+    Parameters:
+    n : int, optional
+        Number of random quotes to invert.
+    iterations : int, optional
+        Number of Halley steps passed to the solver.
+    """
+    S, K, T, r, sigma, is_call = _random_chain(n)
+    prices = black_scholes_batch(S, K, T, r, sigma, option_type=is_call)
+
+    start = time.perf_counter()
+    implied = implied_volatility(prices, S, K, T, r, option_type=is_call, iterations=iterations)
+    elapsed = time.perf_counter() - start
+
+    # Accuracy over every quote the solver returned, masked quotes excluded
+    solved = np.isfinite(implied)
+    error = np.abs(implied[solved] - sigma[solved])
+    print(f"{n:,} quotes in {elapsed:.3f}s ({n / elapsed:,.0f} quotes/sec), "
+          f"{np.count_nonzero(~solved):,} masked, max abs error {error.max():.2e}, "
+          f"{np.count_nonzero(error > 1e-6):,} solved quotes off by more than 1e-6")
+
+
+def benchmark_normal_cdf(n_scalar=100_000, n_array=1_000_000):
+    """
+    Report the cost of each normal CDF backend in nanoseconds per evaluation.
+
+    Scalar timings call the backend once per value; array timings evaluate
+    one array in a single call, for the backends that support it. The max
+    error is measured against scipy.special.ndtr.
+
+    Parameters:
+    n_scalar : int, optional
+        Number of scalar calls per backend.
+    n_array : int, optional
+        Length of the array passed to the array backends.
+    """
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(-6, 6, n_scalar).tolist()
+    xa = rng.uniform(-6, 6, n_array)
+    reference = ndtr(xa)
+
+    for name, (cdf, vectorized) in NORMAL_CDF_BACKENDS.items():
+        start = time.perf_counter()
+        for x in xs:
+            cdf(x)
+        scalar_ns = (time.perf_counter() - start) / n_scalar * 1e9
+        line = f"{name:>6}: scalar {scalar_ns:9.1f} ns/call"
+
+        if vectorized:
+            start = time.perf_counter()
+            values = cdf(xa)
+            array_ns = (time.perf_counter() - start) / n_array * 1e9
+            line += f", array {array_ns:6.2f} ns/value, max error {np.max(np.abs(values - reference)):.1e}"
+        print(line)
+
+
+def _random_chain(n, seed=0):
+    """Generate a random option chain of n contracts for benchmarking."""
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(50, 150, n), rng.uniform(50, 150, n), rng.uniform(0.05, 2.0, n),
+            rng.uniform(0.0, 0.08, n), rng.uniform(0.1, 0.6, n), rng.random(n) < 0.5)
+
+
+def benchmark_batch_pricing(sizes=(1_000, 100_000, 10_000_000), max_scalar=10_000):
+    """
+    Compare black_scholes_batch against a loop over the scalar black_scholes.
+
+    The scalar loop is timed on at most max_scalar contracts and extrapolated
+    to the full chain size, since looping over 10M contracts takes minutes.
+
+    Parameters:
+    sizes : tuple of int, optional
+        Chain sizes to benchmark.
+    max_scalar : int, optional
+        Maximum number of contracts priced through the scalar loop.
+    """
+    for n in sizes:
+        S, K, T, r, sigma, is_call = _random_chain(n)
+
+        start = time.perf_counter()
+        black_scholes_batch(S, K, T, r, sigma, option_type=is_call)
+        batch_time = time.perf_counter() - start
+
+        m = min(n, max_scalar)
+        types = np.where(is_call[:m], 'call', 'put')
+        start = time.perf_counter()
+        for i in range(m):
+            black_scholes(S[i], K[i], T[i], r[i], sigma[i], option_type=types[i])
+        scalar_time = (time.perf_counter() - start) * n / m
+
+        note = "" if m == n else f" (extrapolated from {m:,})"
+        print(f"{n:>12,} contracts: batch {batch_time:.4f}s, scalar loop {scalar_time:.4f}s{note}, "
+              f"speedup {scalar_time / batch_time:,.0f}x")
+
+
+class BSMCache:
+    """
+    Opt-in LRU cache with optional TTL in front of the scalar black_scholes pricer.
+
+    Float inputs are rounded to a fixed number of decimals before they form
+    the cache key, so requests that differ only by floating point noise
+    share an entry. Lookups, inserts and evictions hold a lock, so one cache
+    can serve concurrent requests; prices are computed outside of it.
+    """
+
+    def __init__(self, capacity=10_000, ttl=None, decimals=8, pricer=black_scholes):
+        """
+        Initialize the cache.
+
+        Parameters:
+        capacity : int, optional
+            Maximum number of cached prices. Default is 10,000.
+        ttl : float, optional
+            Seconds an entry stays valid. None keeps entries until evicted.
+        decimals : int, optional
+            Decimal places float inputs are quantized to. Default is 8.
+        pricer : callable, optional
+            Pricing function with the black_scholes signature.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.decimals = decimals
+        self.pricer = pricer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, S, K, T, r, sigma, option_type):
+        return (round(S, self.decimals), round(K, self.decimals), round(T, self.decimals),
+                round(r, self.decimals), round(sigma, self.decimals), option_type.lower())
+
+    def price(self, S, K, T, r, sigma, option_type='call'):
+        """
+        Return the option price, computing it only on a cache miss.
+
+        Parameters are the same as for black_scholes.
+        """
+        key = self._key(S, K, T, r, sigma, option_type)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        value = self.pricer(*key[:5], option_type=key[5])
+        with self._lock:
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drop every cached entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        dict
+            Size, capacity, hits, misses, evictions, expirations and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+if __name__ == '__main__':
+    # Example usage:
+    S = 100  # Current asset price
+    K = 100  # Strike price
+    T = 1  # Time to maturity in years
+    r = 0.05  # Risk-free interest rate (5% for .05)
+    sigma = 0.2  # Volatility (20% for .2)
+
+    call_price = black_scholes(S, K, T, r, sigma, option_type='call')
+    put_price = black_scholes(S, K, T, r, sigma, option_type='put')
+
+    print("Call Option Price:", call_price)
+    print("Put Option Price:", put_price)
+
+    # Repeated requests for unchanged strikes are served from the cache
+    cache = BSMCache(capacity=1_000, ttl=60)
+    for _ in range(3):
+        for strike in (90, 100, 110):
+            cache.price(S, strike, T, r, sigma, option_type='call')
+    print("Cache stats:", cache.stats())
+
+    greeks = black_scholes_greeks(S, K, T, r, sigma, option_type=['call', 'put'])
+    for name, values in greeks.items():
+        print(f"{name.capitalize():>6} (call, put): {values[0]:.6f}, {values[1]:.6f}")
+
+    # The benchmarks price 10M contracts and need over a GB of memory, so they
+    # only run on request: python BlackScholesModel-BSM.py --benchmark
+    if '--benchmark' in sys.argv[1:]:
+        # Benchmark the vectorized pricer against the scalar loop
+        benchmark_batch_pricing()
 
-call_price = black_scholes(S, K, T, r, sigma, option_type='call')
-put_price = black_scholes(S, K, T, r, sigma, option_type='put')
+        # Benchmark the implied volatility solver
+        benchmark_implied_volatility()
 
-print("Call Option Price:", call_price)
-print("Put Option Price:", put_price)
\ No newline at end of file
+        # Benchmark the normal CDF backends
+        benchmark_normal_cdf()
@@ -1,25 +1,191 @@
+import os
+import tempfile
 import numpy as np
+from boltzmann_utils import load_checkpoint, restore_rng, save_checkpoint
 
 class BoltzmannMachine:
 
-    def __init__(self, num_nodes):
+    def __init__(self, num_nodes, seed=None):
         self.num_nodes = num_nodes
-        self.weights = np.random.rand(num_nodes, num_nodes) - 0.5
+        self.rng = np.random.default_rng(seed)  # Random generator owned by this model
+        self.weights = self.rng.random((num_nodes, num_nodes)) - 0.5
         self.weights = 0.5 * (self.weights + self.weights.T)  # Make the matrix symmetric
         np.fill_diagonal(self.weights, 0)  # No self-connections
 
     def energy(self, state):
-        return -0.5 * np.dot(state, np.dot(self.weights, state))
+        # Works on a single state or a (batch x nodes) matrix of states
+        return -0.5 * np.sum((state @ self.weights) * state, axis=-1)
+
+    def free_energy(self, state):
+        # Without hidden units the free energy of a state is its energy
+        return self.energy(state)
 
     def sample(self):
-        state = np.random.choice([0, 1], size=self.num_nodes)
+        state = self.rng.choice([0, 1], size=self.num_nodes)
         for _ in range(100):  # Sampling iterations
-            i = np.random.randint(0, self.num_nodes)
+            i = self.rng.integers(0, self.num_nodes)
             activation = np.dot(self.weights[i], state)
             probability = 1 / (1 + np.exp(-activation))
-            state[i] = 1 if np.random.rand() < probability else 0
+            state[i] = 1 if self.rng.random() < probability else 0
         return state
 
+    def sample_chains(self, num_chains=100, sweeps=10, states=None, beta=1.0):
+        """
+        Run many independent Gibbs chains with systematic sweeps.
+
+        The chains are stored as a (chains x nodes) matrix and each unit is
+        updated in all chains at once. Local fields are computed once per
+        call and then kept current with a rank-one update for the chains
+        where the unit flipped, instead of a dot product per unit.
+
+        Parameters:
+        num_chains : int, optional
+            Number of chains started when states is None. Default is 100.
+        sweeps : int, optional
+            Number of passes over all units. Default is 10.
+        states : numpy.ndarray, optional
+            (chains x nodes) states to continue from. Updated in place.
+        beta : float, optional
+            Inverse temperature the chains sample at. Default is 1.
+
+        Returns:
+        numpy.ndarray
+            The chain states after the sweeps.
+        """
+        if states is None:
+            states = self.rng.integers(0, 2, size=(num_chains, self.num_nodes)).astype(np.float64)
+        fields = states @ self.weights
+        num_chains = states.shape[0]
+
+        for _ in range(sweeps):
+            for i in range(self.num_nodes):
+                probability = 1 / (1 + np.exp(-beta * fields[:, i]))
+                new_values = (self.rng.random(num_chains) < probability).astype(states.dtype)
+                delta = new_values - states[:, i]
+                flipped = np.nonzero(delta)[0]
+                if flipped.size:
+                    states[flipped, i] = new_values[flipped]
+                    fields[flipped] += np.outer(delta[flipped], self.weights[i])
+        return states
+
+    def train_batch(self, data, epochs, learning_rate, num_chains=100, sweeps=1, persistent=True):
+        """
+        Train with batched positive and negative statistics.
+
+        The data correlations come from one matrix product over the whole data
+        set and the model correlations from one over the chains. With
+        persistent chains, each epoch continues the chains of the previous
+        one instead of sampling from scratch.
+
+        Parameters:
+        data : array_like
+            Binary training data with shape (samples x nodes).
+        epochs : int
+            Number of updates.
+        learning_rate : float
+            Step size of the updates.
+        num_chains : int, optional
+            Number of Gibbs chains for the negative phase. Default is 100.
+        sweeps : int, optional
+            Sweeps per update. Default is 1.
+        persistent : bool, optional
+            Keep the chains across updates. Default is True.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        positive_correlations = data.T @ data / data.shape[0]
+        states = None
+
+        for epoch in range(epochs):
+            states = self.sample_chains(num_chains, sweeps, states if persistent else None)
+            negative_correlations = states.T @ states / states.shape[0]
+
+            # Update weights
+            self.weights += learning_rate * (positive_correlations - negative_correlations)
+            np.fill_diagonal(self.weights, 0)  # No self-connections
+
+    def estimate_log_partition(self, num_chains=100, num_betas=1000):
+        """
+        Estimate log Z with annealed importance sampling.
+
+        The annealing path runs from the uniform distribution (beta = 0,
+        log Z = n log 2) to the model (beta = 1). All chains advance together
+        with one vectorized sweep per intermediate temperature.
+
+        Parameters:
+        num_chains : int, optional
+            Number of AIS runs. Default is 100.
+        num_betas : int, optional
+            Number of intermediate distributions. Default is 1000.
+
+        Returns:
+        tuple
+            (log Z estimate, standard deviation of the log importance weights).
+        """
+        betas = np.linspace(0.0, 1.0, num_betas)
+        states = self.rng.integers(0, 2, size=(num_chains, self.num_nodes)).astype(np.float64)
+        log_weights = np.zeros(num_chains)
+        for previous, beta in zip(betas[:-1], betas[1:]):
+            log_weights -= (beta - previous) * self.energy(states)
+            states = self.sample_chains(sweeps=1, states=states, beta=beta)
+
+        # log of the mean importance weight, computed stably
+        log_mean_weight = np.logaddexp.reduce(log_weights) - np.log(num_chains)
+        return float(self.num_nodes * np.log(2) + log_mean_weight), float(np.std(log_weights))
+
+    def log_likelihood(self, data, log_z=None, **ais_options):
+        """
+        Average log-likelihood of a batch of states.
+
+        Parameters:
+        data : array_like
+            States with shape (batch x nodes).
+        log_z : float, optional
+            Log partition function. Estimated with AIS when omitted.
+        **ais_options
+            Passed to estimate_log_partition.
+
+        Returns:
+        float
+            Mean of -E(s) - log Z over the batch.
+        """
+        if log_z is None:
+            log_z, _ = self.estimate_log_partition(**ais_options)
+        return float(np.mean(-self.free_energy(np.asarray(data, dtype=np.float64))) - log_z)
+
+    def save(self, path):
+        """
+        Save the weights and RNG state to a checkpoint directory.
+
+        Parameters:
+        path : str
+            Directory to write the checkpoint to.
+        """
+        save_checkpoint(path, {'weights': self.weights},
+                         {'num_nodes': self.num_nodes, 'rng_state': self.rng.bit_generator.state})
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Load a model saved with save, memory-mapping its weights.
+
+        Parameters:
+        path : str
+            Checkpoint directory.
+        mmap_mode : str or None, optional
+            Passed to np.load. The default read-only mapping shares pages
+            between processes; use 'c' or None to continue training.
+
+        Returns:
+        BoltzmannMachine
+            The restored model.
+        """
+        state, arrays = load_checkpoint(path, mmap_mode)
+        bm = cls.__new__(cls)  # Skip the random initialization
+        bm.num_nodes = state['num_nodes']
+        bm.rng = restore_rng(state['rng_state'])
+        bm.weights = arrays['weights']
+        return bm
+
     def train(self, data, epochs, learning_rate):
         for epoch in range(epochs):
             for sample in data:
@@ -42,3 +208,16 @@ data = np.random.choice([0, 1], (5, num_nodes))
 
 # Training
 bm.train(data, epochs=100, learning_rate=0.1)
+
+# Training with batched statistics and persistent parallel chains
+bm_batch = BoltzmannMachine(num_nodes, seed=42)
+bm_batch.train_batch(data, epochs=100, learning_rate=0.1, num_chains=100, sweeps=1)
+
+# Estimate the log-likelihood of the data under the trained model
+print("Log-likelihood:", bm_batch.log_likelihood(data, num_chains=100, num_betas=500))
+
+# Save a checkpoint and load it back memory-mapped
+checkpoint_dir = os.path.join(tempfile.gettempdir(), 'bm_checkpoint')
+bm_batch.save(checkpoint_dir)
+bm_loaded = BoltzmannMachine.load(checkpoint_dir)
+print("Reloaded energies match:", np.allclose(bm_loaded.energy(data), bm_batch.energy(data)))
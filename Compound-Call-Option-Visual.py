@@ -1,5 +1,13 @@
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.special import ndtr
 
 
 # Define the payoff function for a standard call option
@@ -37,23 +45,549 @@ def compound_call_payoff(S, K_call, K_compound):
     return np.maximum(underlying_call - K_compound, 0)
 
 
-# Parameters
-K_call = 100  # Strike of the underlying call option
-K_compound = 10  # Strike (premium) for the compound option
-S_min, S_max = 0, 200
-S = np.linspace(S_min, S_max, 400)
-
-# Compute payoffs
-payoff_call = call_payoff(S, K_call)
-payoff_compound = compound_call_payoff(S, K_call, K_compound)
-
-# Plotting the payoffs
-plt.figure(figsize=(10, 6))
-plt.plot(S, payoff_call, label=f'Call Option Payoff (K={K_call})', linewidth=2)
-plt.plot(S, payoff_compound, label=f'Compound Call Option Payoff (K_compound={K_compound})', linewidth=2)
-plt.xlabel('Underlying Asset Price at Decision Time')
-plt.ylabel('Payoff')
-plt.title('Payoff Diagram for a Compound Call Option (Call on a Call)')
-plt.legend()
-plt.grid(True)
-plt.show()
+# Black-Scholes price of a European call, vectorized over S
+def bs_call_price(S, K, T, r, sigma):
+    """
+    Black-Scholes price of a European call option.
+
+    Parameters:
+        S (array_like): Underlying asset prices.
+        K (float): Strike price of the call option.
+        T (float): Time to maturity in years.
+        r (float): Risk-free interest rate (annualized).
+        sigma (float): Volatility of the underlying asset (annualized).
+
+    Returns:
+        array_like: Call option prices.
+    """
+    S = np.asarray(S, dtype=np.float64)
+    sig_sqrt_t = sigma * np.sqrt(T)
+    with np.errstate(divide='ignore'):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / sig_sqrt_t
+    d2 = d1 - sig_sqrt_t
+    return S * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2)
+
+
+def _compound_mc_chunk(seed, n_paths, S0, K_call, K_compound, T1, T2, r, sigma, antithetic):
+    """
+    Simulate one chunk of paths and return the running sums needed by the estimator.
+
+    Each path draws the underlying at the decision time T1 from the exact GBM
+    transition and values the underlying call there with Black-Scholes.
+
+    Returns:
+        numpy.ndarray: [samples, sum(y), sum(y^2), sum(x), sum(x^2), sum(x*y)],
+        where y is the discounted compound payoff and x the discounted
+        underlying call value at T1, used as control variate.
+    """
+    rng = np.random.default_rng(seed)
+    drift = (r - 0.5 * sigma ** 2) * T1
+    vol = sigma * np.sqrt(T1)
+    discount = np.exp(-r * T1)
+
+    def discounted_values(z):
+        S_T1 = S0 * np.exp(drift + vol * z)
+        call_value = bs_call_price(S_T1, K_call, T2 - T1, r, sigma)
+        return discount * np.maximum(call_value - K_compound, 0), discount * call_value
+
+    if antithetic:
+        z = rng.standard_normal(n_paths // 2)
+        y_up, x_up = discounted_values(z)
+        y_down, x_down = discounted_values(-z)
+        y, x = 0.5 * (y_up + y_down), 0.5 * (x_up + x_down)
+    else:
+        y, x = discounted_values(rng.standard_normal(n_paths))
+
+    return np.array([y.size, y.sum(), (y * y).sum(), x.sum(), (x * x).sum(), (x * y).sum()])
+
+
+def _compound_mc_estimate(sums, control_mean):
+    """
+    Turn accumulated chunk sums into a price and standard error.
+
+    Parameters:
+        sums (numpy.ndarray): Accumulated output of _compound_mc_chunk.
+        control_mean (float or None): Known mean of the control variate,
+            or None to use the plain sample mean.
+
+    Returns:
+        tuple: (price, standard error).
+    """
+    n, sum_y, sum_y2, sum_x, sum_x2, sum_xy = sums
+    mean_y = sum_y / n
+    var_y = max(sum_y2 / n - mean_y ** 2, 0.0)
+    if control_mean is None:
+        return float(mean_y), float(np.sqrt(var_y / n))
+
+    mean_x = sum_x / n
+    var_x = sum_x2 / n - mean_x ** 2
+    cov_xy = sum_xy / n - mean_x * mean_y
+    beta = cov_xy / var_x if var_x > 0 else 0.0
+    price = mean_y - beta * (mean_x - control_mean)
+    var = max(var_y - beta * cov_xy, 0.0)
+    return float(price), float(np.sqrt(var / n))
+
+
+def iter_compound_call_mc(S0, K_call, K_compound, T1, T2, r, sigma, n_paths=1_000_000,
+                          chunk_size=1_000_000, antithetic=True, control_variate=True,
+                          n_workers=None, seed=None):
+    """
+    Monte Carlo price of a compound call (call on a call), streamed chunk by chunk.
+
+    Paths are simulated in chunks of at most chunk_size, so memory stays
+    bounded however many paths are requested. Only running sums are kept
+    between chunks, and a partial estimate is yielded after each one.
+
+    The discounted value of the underlying call at T1 serves as control
+    variate: its expectation is the Black-Scholes price of the underlying
+    call today, and it is highly correlated with the compound payoff.
+
+    Parameters:
+        S0 (float): Current price of the underlying asset.
+        K_call (float): Strike price of the underlying call option.
+        K_compound (float): Strike price of the compound call option.
+        T1 (float): Maturity of the compound option in years.
+        T2 (float): Maturity of the underlying call option in years, T2 > T1.
+        r (float): Risk-free interest rate (annualized).
+        sigma (float): Volatility of the underlying asset (annualized).
+        n_paths (int): Total number of simulated paths.
+        chunk_size (int): Number of paths per vectorized chunk.
+        antithetic (bool): Pair every draw with its antithetic counterpart.
+        control_variate (bool): Apply the underlying call control variate.
+        n_workers (int or None): Spread chunks over this many processes.
+            None or 1 simulates in the current process.
+        seed (int or None): Seed for reproducible results.
+
+    Yields:
+        dict: 'price', 'std_error', 'paths' done so far and 'paths_per_sec'.
+    """
+    if not 0 < T1 < T2:
+        raise ValueError("maturities must satisfy 0 < T1 < T2")
+
+    sizes = [chunk_size] * (n_paths // chunk_size)
+    if n_paths % chunk_size:
+        sizes.append(n_paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, S0, K_call, K_compound, T1, T2, r, sigma, antithetic) for s, n in zip(seeds, sizes)]
+    control_mean = bs_call_price(S0, K_call, T2, r, sigma) if control_variate else None
+
+    sums = np.zeros(6)
+    paths = 0
+    start = time.perf_counter()
+
+    def estimates(chunks):
+        nonlocal sums, paths
+        for size, chunk_sums in zip(sizes, chunks):
+            sums += chunk_sums
+            paths += size
+            price, std_error = _compound_mc_estimate(sums, control_mean)
+            yield {'price': price, 'std_error': std_error, 'paths': paths,
+                   'paths_per_sec': paths / (time.perf_counter() - start)}
+
+    if n_workers is None or n_workers <= 1:
+        yield from estimates(_compound_mc_chunk(*a) for a in args)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            yield from estimates(executor.map(_compound_mc_chunk, *zip(*args)))
+
+
+def price_compound_call_mc(S0, K_call, K_compound, T1, T2, r, sigma, **kwargs):
+    """
+    Monte Carlo price of a compound call, returning only the final estimate.
+
+    Accepts the same parameters as iter_compound_call_mc.
+
+    Returns:
+        dict: 'price', 'std_error', 'paths' and 'paths_per_sec'.
+    """
+    result = None
+    for result in iter_compound_call_mc(S0, K_call, K_compound, T1, T2, r, sigma, **kwargs):
+        pass
+    return result
+
+
+# Gauss-Legendre rules used by the bivariate normal CDF, keyed by point count
+_GAUSS_LEGENDRE = {n: np.polynomial.legendre.leggauss(n) for n in (6, 12, 20)}
+
+
+def _bvn_upper_moderate(h, k, r, n_points):
+    """Upper bivariate normal probability for |r| < 0.925 (Genz, 2004)."""
+    x, w = _GAUSS_LEGENDRE[n_points]
+    hk = (h * k)[:, None]
+    hs = ((h * h + k * k) / 2)[:, None]
+    asr = np.arcsin(r)
+    sn = np.sin(asr[:, None] * (x + 1) / 2)
+    bvn = np.exp((sn * hk - hs) / (1 - sn * sn)) @ w
+    return bvn * asr / (4 * np.pi) + ndtr(-h) * ndtr(-k)
+
+
+def _bvn_upper_high(h, k, r):
+    """Upper bivariate normal probability for |r| >= 0.925 (Genz, 2004)."""
+    x, w = _GAUSS_LEGENDRE[20]
+    k = np.where(r < 0, -k, k)
+    hk = h * k
+    a_sq = (1 - r) * (1 + r)
+    a = np.sqrt(a_sq)
+    b_sq = (h - k) ** 2
+    c = (4 - hk) / 8
+    d = (12 - hk) / 16
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        bvn = a * np.exp(-(b_sq / a_sq + hk) / 2) * (
+            1 - c * (b_sq - a_sq) * (1 - d * b_sq / 5) / 3 + c * d * a_sq * a_sq / 5)
+        b = np.sqrt(b_sq)
+        tail = np.exp(-hk / 2) * np.sqrt(2 * np.pi) * ndtr(-b / a) * b * (1 - c * b_sq * (1 - d * b_sq / 5) / 3)
+        bvn = bvn - np.where(hk > -160, tail, 0.0)
+
+        half_a = (a / 2)[:, None]
+        xs = (half_a * (x + 1)) ** 2
+        rs = np.sqrt(1 - xs)
+        asr = -(b_sq[:, None] / xs + hk[:, None]) / 2
+        terms = np.exp(asr) * (np.exp(-hk[:, None] * xs / (2 * (1 + rs) ** 2)) / rs
+                               - (1 + c[:, None] * xs * (1 + d[:, None] * xs)))
+        bvn = bvn + (half_a[:, 0] * (np.where(asr > -100, terms, 0.0) @ w))
+    bvn = -bvn / (2 * np.pi)
+
+    return np.where(r > 0, bvn + ndtr(-np.maximum(h, k)),
+                    -bvn + np.maximum(0.0, ndtr(-h) - ndtr(-k)))
+
+
+def bivariate_normal_cdf(a, b, rho):
+    """
+    Vectorized standard bivariate normal CDF P(X < a, Y < b) with correlation rho.
+
+    Uses Genz's Gauss-Legendre quadrature (Genz, 2004), picking 6, 12 or 20
+    nodes by |rho| and a series expansion for |rho| >= 0.925. The absolute
+    error is around 1e-15, and every group is evaluated as one array
+    operation.
+
+    Parameters:
+        a (array_like): Upper integration limits for X.
+        b (array_like): Upper integration limits for Y.
+        rho (array_like): Correlation coefficients in [-1, 1].
+
+    Returns:
+        numpy.ndarray: Probabilities with the broadcast shape of the inputs.
+    """
+    a, b, rho = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (a, b, rho)))
+    shape = a.shape
+    h, k, r = -a.ravel(), -b.ravel(), rho.ravel()
+    result = np.empty(h.shape)
+
+    abs_r = np.abs(r)
+    for low, high, n_points in ((0.0, 0.3, 6), (0.3, 0.75, 12), (0.75, 0.925, 20)):
+        idx = np.nonzero((abs_r >= low) & (abs_r < high))[0]
+        if idx.size:
+            result[idx] = _bvn_upper_moderate(h[idx], k[idx], r[idx], n_points)
+
+    idx = np.nonzero((abs_r >= 0.925) & (abs_r < 1))[0]
+    if idx.size:
+        result[idx] = _bvn_upper_high(h[idx], k[idx], r[idx])
+
+    # Perfectly correlated or anti-correlated limits
+    idx = np.nonzero(r >= 1)[0]
+    result[idx] = ndtr(-np.maximum(h[idx], k[idx]))
+    idx = np.nonzero(r <= -1)[0]
+    result[idx] = np.maximum(0.0, ndtr(-h[idx]) - ndtr(k[idx]))
+
+    return np.clip(result, 0.0, 1.0).reshape(shape)
+
+
+def geske_critical_price(K_call, K_compound, tau, r, sigma, tol=1e-10, max_iter=50):
+    """
+    Underlying price at which the underlying call is worth exactly K_compound.
+
+    Solves bs_call_price(S, K_call, tau, r, sigma) = K_compound for every
+    scenario at once. Newton's method starts to the right of the root,
+    where the call value is at least K_compound, and converges
+    monotonically because the call price is convex and increasing in S.
+
+    Parameters:
+        K_call (array_like): Strike price of the underlying call option.
+        K_compound (array_like): Strike price of the compound call option.
+        tau (array_like): Remaining life of the underlying call at T1.
+        r (array_like): Risk-free interest rate (annualized).
+        sigma (array_like): Volatility of the underlying asset (annualized).
+        tol (float): Absolute tolerance on the call value.
+        max_iter (int): Maximum number of Newton steps.
+
+    Returns:
+        numpy.ndarray: Critical underlying prices.
+    """
+    K_call, K_compound, tau, r, sigma = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (K_call, K_compound, tau, r, sigma)))
+    S = np.maximum(K_call * np.exp(-r * tau), K_call) + K_compound
+    sig_sqrt_t = sigma * np.sqrt(tau)
+
+    for _ in range(max_iter):
+        d1 = (np.log(S / K_call) + (r + 0.5 * sigma ** 2) * tau) / sig_sqrt_t
+        value = S * ndtr(d1) - K_call * np.exp(-r * tau) * ndtr(d1 - sig_sqrt_t)
+        diff = value - K_compound
+        S = S - diff / ndtr(d1)
+        if np.all(np.abs(diff) < tol):
+            break
+    return S
+
+
+def geske_compound_call_price(S0, K_call, K_compound, T1, T2, r, sigma):
+    """
+    Closed-form price of a compound call (call on a call) by Geske (1979).
+
+    All parameters broadcast, so a whole grid of scenarios is priced in
+    one array call.
+
+    Parameters:
+        S0 (array_like): Current price of the underlying asset.
+        K_call (array_like): Strike price of the underlying call option.
+        K_compound (array_like): Strike price of the compound call option.
+        T1 (array_like): Maturity of the compound option in years.
+        T2 (array_like): Maturity of the underlying call option in years, T2 > T1.
+        r (array_like): Risk-free interest rate (annualized).
+        sigma (array_like): Volatility of the underlying asset (annualized).
+
+    Returns:
+        numpy.ndarray: Compound call prices.
+    """
+    S0, K_call, K_compound, T1, T2, r, sigma = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (S0, K_call, K_compound, T1, T2, r, sigma)))
+    if np.any(T1 <= 0) or np.any(T2 <= T1):
+        raise ValueError("maturities must satisfy 0 < T1 < T2")
+
+    S_star = geske_critical_price(K_call, K_compound, T2 - T1, r, sigma)
+    a1 = (np.log(S0 / S_star) + (r + 0.5 * sigma ** 2) * T1) / (sigma * np.sqrt(T1))
+    a2 = a1 - sigma * np.sqrt(T1)
+    b1 = (np.log(S0 / K_call) + (r + 0.5 * sigma ** 2) * T2) / (sigma * np.sqrt(T2))
+    b2 = b1 - sigma * np.sqrt(T2)
+    rho = np.sqrt(T1 / T2)
+
+    return (S0 * bivariate_normal_cdf(a1, b1, rho)
+            - K_call * np.exp(-r * T2) * bivariate_normal_cdf(a2, b2, rho)
+            - K_compound * np.exp(-r * T1) * ndtr(a2))
+
+
+def benchmark_geske(n_scenarios=100_000, n_paths=10_000_000, seed=0):
+    """
+    Time the Geske pricer on a random scenario grid and check it against Monte Carlo.
+
+    Parameters:
+        n_scenarios (int): Number of (K_call, K_compound, T1, T2) scenarios.
+        n_paths (int): Paths for the Monte Carlo comparison.
+        seed (int): Seed for the scenarios and the simulation.
+    """
+    from scipy.stats import multivariate_normal
+
+    rng = np.random.default_rng(seed)
+    a, b = rng.normal(0, 2, (2, n_scenarios))
+    rho = rng.uniform(-0.999, 0.999, n_scenarios)
+    start = time.perf_counter()
+    fast = bivariate_normal_cdf(a, b, rho)
+    bvn_time = time.perf_counter() - start
+
+    n_ref = min(n_scenarios, 500)
+    start = time.perf_counter()
+    reference = np.array([multivariate_normal.cdf([a[i], b[i]], cov=[[1, rho[i]], [rho[i], 1]])
+                          for i in range(n_ref)])
+    ref_time = (time.perf_counter() - start) * n_scenarios / n_ref
+    print(f"Bivariate normal CDF, {n_scenarios:,} points: {bvn_time:.4f}s vectorized, "
+          f"~{ref_time:.1f}s scipy loop, max diff {np.max(np.abs(fast[:n_ref] - reference)):.1e}")
+
+    K_call = rng.uniform(80, 120, n_scenarios)
+    K_compound = rng.uniform(2, 15, n_scenarios)
+    T1 = rng.uniform(0.1, 1.0, n_scenarios)
+    T2 = T1 + rng.uniform(0.1, 1.0, n_scenarios)
+    start = time.perf_counter()
+    geske_compound_call_price(100, K_call, K_compound, T1, T2, 0.05, 0.2)
+    geske_time = time.perf_counter() - start
+    print(f"Geske pricer, {n_scenarios:,} scenarios: {geske_time:.4f}s "
+          f"({n_scenarios / geske_time:,.0f} scenarios/sec)")
+
+    start = time.perf_counter()
+    closed_form = float(geske_compound_call_price(100, 100, 10, 0.5, 1.0, 0.05, 0.2))
+    geske_single = time.perf_counter() - start
+    mc = price_compound_call_mc(100, 100, 10, 0.5, 1.0, 0.05, 0.2, n_paths=n_paths, seed=seed)
+    print(f"Single scenario: Geske {closed_form:.5f} in {geske_single * 1e3:.2f} ms, Monte Carlo "
+          f"{mc['price']:.5f} +/- {mc['std_error']:.5f} in {mc['paths'] / mc['paths_per_sec']:.2f}s")
+
+
+# Leg payoff codes used by strategy_payoffs
+_LEG_KINDS = {'call': 0, 'put': 1, 'stock': 2, 'compound_call': 3}
+
+
+def strategy_payoffs(S, strategies):
+    """
+    Terminal payoffs of many multi-leg strategies on a shared price grid.
+
+    Every leg of every strategy is evaluated in one array operation, and the
+    legs are summed into strategies with a single matrix product.
+
+    Parameters:
+        S (array_like): Shared grid of underlying asset prices.
+        strategies (list of dict): Each strategy has a 'name' and a list of
+            'legs'. A leg is a dict with 'kind' ('call', 'put', 'stock' or
+            'compound_call'), 'strike' (the entry price for stock),
+            optional 'quantity' (default 1, negative for short) and, for
+            compound calls, 'K_compound'.
+
+    Returns:
+        numpy.ndarray: Payoffs with shape (len(strategies), len(S)).
+    """
+    S = np.asarray(S, dtype=np.float64)
+    legs = [(i, leg) for i, strategy in enumerate(strategies) for leg in strategy['legs']]
+    unknown = {leg['kind'] for _, leg in legs} - set(_LEG_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown leg kinds: {sorted(unknown)}")
+
+    kinds = np.array([_LEG_KINDS[leg['kind']] for _, leg in legs])[:, None]
+    strikes = np.array([leg['strike'] for _, leg in legs], dtype=np.float64)[:, None]
+    K_compound = np.array([leg.get('K_compound', 0.0) for _, leg in legs], dtype=np.float64)[:, None]
+
+    # One row per leg: call, put, stock and compound call payoffs
+    call = call_payoff(S, strikes)
+    leg_payoffs = np.select([kinds == 0, kinds == 1, kinds == 2],
+                            [call, np.maximum(strikes - S, 0), S - strikes],
+                            np.maximum(call - K_compound, 0))
+
+    # Sum the legs into their strategies with a (strategies x legs) weight matrix
+    weights = np.zeros((len(strategies), len(legs)))
+    for j, (i, leg) in enumerate(legs):
+        weights[i, j] = leg.get('quantity', 1)
+    return weights @ leg_payoffs
+
+
+# Figure reused by every chart rendered in this process
+_render_state = {}
+
+
+def _init_renderer(S, dpi):
+    """Create the figure, axes and payoff line that each process reuses."""
+    fig = Figure(figsize=(10, 6), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.axhline(0, color='black', linewidth=0.8)
+    line, = ax.plot(S, np.zeros_like(S), linewidth=2)
+    ax.set_xlabel('Underlying Asset Price at Expiry')
+    ax.set_ylabel('Payoff')
+    ax.grid(True)
+    _render_state.update(fig=fig, ax=ax, line=line)
+
+
+def _render_charts(jobs):
+    """
+    Render a batch of charts with the process-wide figure.
+
+    Parameters:
+        jobs (list of tuple): (name, payoff row, output paths) per chart.
+
+    Returns:
+        list of tuple: (name, output paths, seconds) per chart.
+    """
+    fig, ax, line = _render_state['fig'], _render_state['ax'], _render_state['line']
+    timings = []
+    for name, payoff, paths in jobs:
+        start = time.perf_counter()
+        line.set_ydata(payoff)
+        line.set_label(name)
+        ax.set_title(f'Payoff Diagram: {name}')
+        ax.relim()
+        ax.autoscale_view()
+        ax.legend(loc='upper left')
+        for path in paths:
+            fig.savefig(path)
+        timings.append((name, paths, time.perf_counter() - start))
+    return timings
+
+
+def render_payoff_diagrams(strategies, output_dir, S=None, formats=('png',), n_workers=None,
+                           batch_size=16, dpi=100):
+    """
+    Render payoff diagrams for many strategies to image files.
+
+    Payoffs for all strategies are computed once on the shared grid. Charts
+    are drawn with the Agg canvas, reusing one figure per process instead
+    of building a new one per chart, and batches can be spread across
+    worker processes.
+
+    Parameters:
+        strategies (list of dict): Strategies as accepted by strategy_payoffs.
+        output_dir (str): Directory the image files are written to.
+        S (array_like or None): Shared price grid. Defaults to 400 points on [0, 200].
+        formats (tuple of str): Image formats to write, e.g. ('png', 'svg').
+        n_workers (int or None): Number of worker processes. None or 1
+            renders in the current process.
+        batch_size (int): Charts sent to a worker per task.
+        dpi (int): Resolution of raster output.
+
+    Returns:
+        list of dict: 'name', 'paths' and render 'seconds' per chart.
+    """
+    S = np.linspace(0, 200, 400) if S is None else np.asarray(S, dtype=np.float64)
+    payoffs = strategy_payoffs(S, strategies)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for i, (strategy, payoff) in enumerate(zip(strategies, payoffs)):
+        stem = re.sub(r'[^A-Za-z0-9_-]+', '_', strategy['name']).strip('_') or 'strategy'
+        paths = [os.path.join(output_dir, f"{i:04d}_{stem}.{fmt}") for fmt in formats]
+        jobs.append((strategy['name'], payoff, paths))
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    if n_workers is None or n_workers <= 1:
+        _init_renderer(S, dpi)
+        results = map(_render_charts, batches)
+    else:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_renderer, initargs=(S, dpi))
+        with executor:
+            results = list(executor.map(_render_charts, batches))
+
+    return [{'name': name, 'paths': paths, 'seconds': seconds}
+            for batch in results for name, paths, seconds in batch]
+
+
+if __name__ == '__main__':
+    # Parameters
+    K_call = 100  # Strike of the underlying call option
+    K_compound = 10  # Strike (premium) for the compound option
+    S_min, S_max = 0, 200
+    S = np.linspace(S_min, S_max, 400)
+
+    # Compute payoffs
+    payoff_call = call_payoff(S, K_call)
+    payoff_compound = compound_call_payoff(S, K_call, K_compound)
+
+    # Price the compound call today with Monte Carlo
+    S0, T1, T2, r, sigma = 100, 0.5, 1.0, 0.05, 0.2
+    mc = price_compound_call_mc(S0, K_call, K_compound, T1, T2, r, sigma, n_paths=10_000_000, seed=42)
+    print(f"Compound call price (Monte Carlo): {mc['price']:.4f} +/- {mc['std_error']:.4f} "
+          f"({mc['paths_per_sec']:,.0f} paths/sec)")
+    geske = geske_compound_call_price(S0, K_call, K_compound, T1, T2, r, sigma)
+    print(f"Compound call price (Geske closed form): {geske:.4f}")
+
+    # The Geske benchmark simulates another 10M paths, so it only runs on
+    # request: python Compound-Call-Option-Visual.py --benchmark
+    if '--benchmark' in sys.argv[1:]:
+        benchmark_geske()
+
+    # Render a set of strategy diagrams to files in parallel
+    strategies = [
+        {'name': 'Long Call', 'legs': [{'kind': 'call', 'strike': K_call}]},
+        {'name': 'Compound Call', 'legs': [{'kind': 'compound_call', 'strike': K_call, 'K_compound': K_compound}]},
+        {'name': 'Straddle', 'legs': [{'kind': 'call', 'strike': 100}, {'kind': 'put', 'strike': 100}]},
+        {'name': 'Bull Call Spread', 'legs': [{'kind': 'call', 'strike': 90},
+                                              {'kind': 'call', 'strike': 110, 'quantity': -1}]},
+        {'name': 'Covered Call', 'legs': [{'kind': 'stock', 'strike': 100},
+                                          {'kind': 'call', 'strike': 120, 'quantity': -1}]},
+    ]
+    rendered = render_payoff_diagrams(strategies, 'payoff_diagrams', S=S, formats=('png', 'svg'), n_workers=2)
+    for chart in rendered:
+        print(f"Rendered {chart['name']} in {chart['seconds'] * 1e3:.1f} ms")
+
+    # Plotting the payoffs
+    plt.figure(figsize=(10, 6))
+    plt.plot(S, payoff_call, label=f'Call Option Payoff (K={K_call})', linewidth=2)
+    plt.plot(S, payoff_compound, label=f'Compound Call Option Payoff (K_compound={K_compound})', linewidth=2)
+    plt.xlabel('Underlying Asset Price at Decision Time')
+    plt.ylabel('Payoff')
+    plt.title('Payoff Diagram for a Compound Call Option (Call on a Call)')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
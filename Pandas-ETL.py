@@ -1,52 +1,245 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import pandas as pd
 
-# Specify the folder containing the .txt files
-folder_path = r"D:\names"  # Formatted folder path
 
-# List to hold data from all .txt files
-dataframes = []
+# Infer the types of the text columns once from a sample of one file, to be reused for every file.
+# Numeric columns are left to be inferred per file, so a column that is whole numbers in one file
+# and has decimals or blanks in another is upcast on concat instead of failing the read.
+def infer_dtypes(file_path, delimiter="\t", encoding="utf-8", sample_rows=10000):
+    sample = pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, nrows=sample_rows)
+    return {column: dtype for column, dtype in sample.dtypes.items() if pd.api.types.is_string_dtype(dtype)}
 
-# Loop through all .txt files in the folder
-for file in os.listdir(folder_path):
-    if file.endswith(".txt"):  # Process only .txt files
-        file_path = os.path.join(folder_path, file)
+
+# Read one file with the shared dtypes; returns the data and the seconds it took
+def read_file(file_path, dtypes=None, engine="pyarrow", delimiter="\t", encoding="utf-8"):
+    start = time.perf_counter()
+    try:
+        data = _read_file(file_path, dtypes, engine, delimiter, encoding)
+    except Exception:
+        if not dtypes:
+            raise
+        # The shared dtypes do not fit this file, so read it with its own inferred types
+        data = _read_file(file_path, None, engine, delimiter, encoding)
+    return data, time.perf_counter() - start
+
+
+def _read_file(file_path, dtypes, engine, delimiter, encoding):
+    if engine == "pyarrow":
+        # Read into an Arrow table, which can be concatenated without copying
+        import pyarrow.csv as pa_csv
+        return pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(encoding=encoding),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+            convert_options=pa_csv.ConvertOptions(column_types=dtypes),
+        )
+    return pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, dtype=dtypes, engine=engine)
+
+
+# Infer the Arrow types of the text columns once from the first block of one file
+def infer_arrow_schema(file_path, delimiter="\t", encoding="utf-8"):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    with pa_csv.open_csv(file_path, read_options=pa_csv.ReadOptions(encoding=encoding),
+                         parse_options=pa_csv.ParseOptions(delimiter=delimiter)) as reader:
+        return {field.name: field.type for field in reader.schema if pa.types.is_string(field.type)}
+
+
+# Read every .txt file of a folder in parallel and combine them into one DataFrame
+def load_folder(folder_path, engine="pyarrow", max_workers=None, use_processes=False, concat_every=8,
+                delimiter="\t", encoding="utf-8"):
+    """
+    Files are read in a thread pool (or a process pool with use_processes)
+    and folded into the result as they complete, so one slow file does not
+    hold up the others. The types of the text columns are inferred once,
+    from the first file, and reused for all files; numeric columns are
+    inferred per file and upcast when combined, as pd.concat would. A file
+    that does not fit the shared types is re-read with its own.
+
+    Rows keep the sorted file order whatever order the reads finish in:
+    results are folded in as soon as every earlier file is done, and each
+    one is released once it has been folded in.
+
+    With engine="pyarrow" (the default) the files are read as Arrow tables,
+    concatenated without copying and converted to pandas with self_destruct,
+    which frees each column as it is converted, so peak memory stays well
+    under twice the data. The pandas engines ("c", "python") combine
+    finished frames every concat_every files, but the final concat still
+    holds those parts and the result at once, so their peak memory is at
+    least twice the data.
+
+    Returns the combined DataFrame (None when nothing could be read) and a
+    report dict with per-file timings, failed files with their errors,
+    total MB read and MB/s.
+    """
+    files = sorted(os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".txt"))
+    report = {"files": {}, "failed": {}, "megabytes": 0.0, "seconds": 0.0, "mb_per_sec": 0.0}
+    if not files:
+        return None, report
+
+    start = time.perf_counter()
+    dtypes = None
+    for file_path in files:
         try:
-            # Read the .txt file into a DataFrame
-            df = pd.read_csv(file_path, delimiter="\t", encoding="utf-8")  # Adjust delimiter and encoding if necessary
-            dataframes.append(df)
+            if engine == "pyarrow":
+                dtypes = infer_arrow_schema(file_path, delimiter, encoding)
+            else:
+                dtypes = infer_dtypes(file_path, delimiter, encoding)
+            break
         except Exception as e:
-            print(f"Error reading {file}: {e}")
+            report["failed"][file_path] = repr(e)
 
-# Check if there are files to combine
-if dataframes:
-    # Combine all DataFrames into one
-    combined_df = pd.concat(dataframes, ignore_index=True)
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    positions = {file_path: position for position, file_path in enumerate(files)}
+    # Results that finished ahead of an earlier file, keyed by position; None marks a failed file
+    finished = {positions[file_path]: None for file_path in report["failed"]}
+    next_position = 0
+    parts, pending = [], []
+    with executor_class(max_workers=max_workers) as executor:
+        futures = {executor.submit(read_file, f, dtypes, engine, delimiter, encoding): f
+                   for f in files if f not in report["failed"]}
+        for future in as_completed(futures):
+            # Popping the future drops its reference to the result once it is folded in
+            file_path = futures.pop(future)
+            try:
+                data, seconds = future.result()
+            except Exception as e:
+                report["failed"][file_path] = repr(e)
+                data = None
+            else:
+                report["files"][file_path] = seconds
+                report["megabytes"] += os.path.getsize(file_path) / 1e6
+            finished[positions[file_path]] = data
+            future = data = None
 
-    # Split the data into three parts
-    total_rows = len(combined_df)
-    part_size = total_rows // 3
+            # Fold the contiguous run of finished files in sorted order, so the row order is stable
+            while next_position in finished:
+                data = finished.pop(next_position)
+                next_position += 1
+                if data is not None:
+                    pending.append(data)
+            data = None
+            if engine != "pyarrow" and len(pending) >= concat_every:
+                parts.append(pd.concat(pending, ignore_index=True))
+                pending = []
+    futures = None
 
-    sheet1_df = combined_df.iloc[:part_size].copy()
-    sheet1_df["Sheet"] = "Sheet1"
+    if engine == "pyarrow":
+        import pyarrow as pa
+        combined = None
+        if pending:
+            try:
+                # Permissive promotion widens int64 to double and fills columns missing from some files with nulls
+                table = pa.concat_tables(pending, promote_options="permissive")
+            except pa.ArrowTypeError:
+                # A column is numbers in some files and text in others, which only pandas can mix
+                combined = pd.concat([t.to_pandas() for t in pending], ignore_index=True)
+            else:
+                # Drop the per-file tables so self_destruct can free each column once it is converted
+                pending = None
+                combined = table.to_pandas(self_destruct=True, split_blocks=True)
+                table = None
+    else:
+        parts.extend(pending)
+        combined = pd.concat(parts, ignore_index=True) if parts else None
+    pending = parts = None
 
-    sheet2_df = combined_df.iloc[part_size:2 * part_size].copy()
-    sheet2_df["Sheet"] = "Sheet2"
+    report["seconds"] = time.perf_counter() - start
+    report["mb_per_sec"] = report["megabytes"] / report["seconds"] if report["seconds"] else 0.0
+    return combined, report
 
-    sheet3_df = combined_df.iloc[2 * part_size:].copy()
-    sheet3_df["Sheet"] = "Sheet3"
 
-    # Specify output Excel file path
-    output_file = r"D:\Output\NewMicrosoftExcelWorksheet.xlsx"  # Formatted output path
+# Excel's hard limit on rows per worksheet, header included
+EXCEL_MAX_ROWS = 1048576
 
-    # Save the split DataFrames to separate sheets in the Excel file
-    try:
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-            sheet1_df.to_excel(writer, sheet_name="Sheet1", index=False)
-            sheet2_df.to_excel(writer, sheet_name="Sheet2", index=False)
-            sheet3_df.to_excel(writer, sheet_name="Sheet3", index=False)
-        print(f"Combined data saved successfully in Excel format at: {output_file}")
-    except Exception as e:
-        print(f"Error saving the Excel file: {e}")
-else:
-    print("No valid .txt files found to combine.")
\ No newline at end of file
+
+# Split row positions [0, total_rows) into `parts` ranges, the last taking the remainder
+def split_row_ranges(total_rows, parts=3):
+    part_size = total_rows // parts
+    bounds = [i * part_size for i in range(parts)] + [total_rows]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# Write a DataFrame to Excel through a write-only (streaming) openpyxl workbook
+def write_excel_streaming(df, output_file, parts=3, sheet_prefix="Sheet", add_sheet_column=True,
+                          chunk_rows=10000):
+    """
+    Rows are streamed into the sheets a chunk at a time, and openpyxl's
+    write-only mode keeps constant memory instead of building every cell
+    object. The parts are row ranges of df read through iloc, so no copies
+    of the slices are made, and the "Sheet" column is appended per row
+    instead of being added to a copied frame. A part longer than Excel's
+    row limit rolls over into additional sheets named "<sheet>_2", ...
+
+    Returns the list of sheet names written.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    header = list(map(str, df.columns)) + (["Sheet"] if add_sheet_column else [])
+    max_data_rows = EXCEL_MAX_ROWS - 1
+    sheet_names = []
+
+    for part, (start, stop) in enumerate(split_row_ranges(len(df), parts), start=1):
+        base_name = f"{sheet_prefix}{part}"
+        extra = (base_name,) if add_sheet_column else ()
+        for roll, sheet_start in enumerate(range(start, max(stop, start + 1), max_data_rows), start=1):
+            name = base_name if roll == 1 else f"{base_name}_{roll}"
+            worksheet = workbook.create_sheet(title=name)
+            worksheet.append(header)
+            sheet_names.append(name)
+
+            sheet_stop = min(sheet_start + max_data_rows, stop)
+            for chunk_start in range(sheet_start, sheet_stop, chunk_rows):
+                # Only this chunk is converted to Python objects, with missing values as empty cells
+                chunk = df.iloc[chunk_start:min(chunk_start + chunk_rows, sheet_stop)].astype(object)
+                chunk = chunk.where(chunk.notna(), None)
+                for row in chunk.itertuples(index=False, name=None):
+                    worksheet.append(row + extra)
+
+    workbook.save(output_file)
+    return sheet_names
+
+
+# Save the combined data as Excel, or as Parquet/CSV, which are much faster for large outputs
+def write_output(df, output_file, parts=3):
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension == ".parquet":
+        df.to_parquet(output_file, index=False)
+    elif extension == ".csv":
+        df.to_csv(output_file, index=False, chunksize=100000)
+    elif extension == ".xlsx":
+        write_excel_streaming(df, output_file, parts=parts)
+    else:
+        raise ValueError(f"Unsupported output format '{extension}', use .xlsx, .parquet or .csv")
+
+
+if __name__ == "__main__":
+    # Specify the folder containing the .txt files
+    folder_path = r"D:\names"  # Formatted folder path
+
+    # Read all .txt files in parallel; failed files are collected instead of printed
+    combined_df, report = load_folder(folder_path, engine="pyarrow")
+    print(f"Read {len(report['files'])} files ({report['megabytes']:.1f} MB) in {report['seconds']:.2f}s "
+          f"({report['mb_per_sec']:.1f} MB/s)")
+    for file_path, seconds in sorted(report["files"].items(), key=lambda item: -item[1])[:5]:
+        print(f"  {os.path.basename(file_path)}: {seconds:.3f}s")
+    if report["failed"]:
+        print(f"{len(report['failed'])} file(s) could not be read: {', '.join(map(os.path.basename, report['failed']))}")
+
+    # Check if there are files to combine
+    if combined_df is not None:
+        # Specify output file path; .parquet or .csv are much faster than .xlsx for large outputs
+        output_file = r"D:\Output\NewMicrosoftExcelWorksheet.xlsx"  # Formatted output path
+
+        # Stream the data into three sheets split by row ranges, without copying the slices
+        try:
+            start = time.perf_counter()
+            write_output(combined_df, output_file, parts=3)
+            print(f"Combined data saved successfully at: {output_file} ({time.perf_counter() - start:.1f}s)")
+        except Exception as e:
+            print(f"Error saving the output file: {e}")
+    else:
+        print("No valid .txt files found to combine.")
\ No newline at end of file
@@ -0,0 +1,215 @@
+import asyncio
+import random
+import time
+from itertools import islice
+
+import aiomysql
+import pymysql
+
+# Database connection details
+host = "localhost"
+user = "your_username"
+password = "your_password"
+database = "your_database"
+
+# Function to create an async connection pool; maxsize bounds the open connections
+async def create_pool(minsize=1, maxsize=10):
+    try:
+        pool = await aiomysql.create_pool(
+            host=host,
+            user=user,
+            password=password,
+            db=database,
+            minsize=minsize,
+            maxsize=maxsize,
+            cursorclass=aiomysql.DictCursor
+        )
+        print("Connection pool created successfully!")
+        return pool
+    except pymysql.Error as e:
+        print(f"Error creating the connection pool: {e}")
+        return None
+
+# Function to run coroutines with at most `limit` of them in flight at once.
+# Workers pull from the iterable one item at a time, so a generator is only
+# advanced as results complete and is never built up front.
+async def run_bounded(coroutines, limit=50):
+    pending = enumerate(coroutines)
+    results = {}
+
+    async def worker():
+        for index, coroutine in pending:
+            results[index] = await coroutine
+
+    await asyncio.gather(*(worker() for _ in range(limit)))
+    return [results[index] for index in range(len(results))]
+
+# Function to create a table
+async def create_table(pool):
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            sql = """
+            CREATE TABLE IF NOT EXISTS employees (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                position VARCHAR(100) NOT NULL,
+                salary DECIMAL(10, 2) NOT NULL
+            )
+            """
+            await cursor.execute(sql)
+            await connection.commit()
+            print("Table 'employees' created successfully!")
+    except pymysql.Error as e:
+        print(f"Error creating table: {e}")
+
+# Function to insert data into the table
+async def insert_data(pool, name, position, salary):
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            sql = "INSERT INTO employees (name, position, salary) VALUES (%s, %s, %s)"
+            await cursor.execute(sql, (name, position, salary))
+            await connection.commit()
+            return cursor.lastrowid
+    except pymysql.Error as e:
+        print(f"Error inserting data: {e}")
+        return None
+
+# Function to query all data from the table
+async def query_data(pool):
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute("SELECT * FROM employees")
+            return await cursor.fetchall()
+    except pymysql.Error as e:
+        print(f"Error querying data: {e}")
+        return []
+
+# Function to update data in the table
+async def update_data(pool, employee_id, new_salary):
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            sql = "UPDATE employees SET salary = %s WHERE id = %s"
+            await cursor.execute(sql, (new_salary, employee_id))
+            await connection.commit()
+            return cursor.rowcount
+    except pymysql.Error as e:
+        print(f"Error updating data: {e}")
+        return 0
+
+# Function to delete data from the table
+async def delete_data(pool, employee_id):
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            sql = "DELETE FROM employees WHERE id = %s"
+            await cursor.execute(sql, (employee_id,))
+            await connection.commit()
+            return cursor.rowcount
+    except pymysql.Error as e:
+        print(f"Error deleting data: {e}")
+        return 0
+
+# Function to update many salaries with one statement per batch
+async def _update_salary_batch(pool, batch):
+    # UPDATE ... SET salary = CASE id WHEN ... THEN ... END WHERE id IN (...)
+    cases = " ".join(["WHEN %s THEN %s"] * len(batch))
+    placeholders = ", ".join(["%s"] * len(batch))
+    sql = f"UPDATE employees SET salary = CASE id {cases} END WHERE id IN ({placeholders})"
+    params = [value for pair in batch for value in pair] + [employee_id for employee_id, _ in batch]
+    try:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(sql, params)
+            await connection.commit()
+            return cursor.rowcount
+    except pymysql.Error as e:
+        print(f"Error updating a batch of {len(batch)} salaries: {e}")
+        return 0
+
+async def batch_update_salaries(pool, updates, batch_size=500, concurrency=4):
+    # updates is a dict or an iterable of (employee_id, new_salary) pairs.
+    # Batches are pipelined over up to `concurrency` pooled connections.
+    updates = iter(updates.items() if isinstance(updates, dict) else updates)
+    batches = iter(lambda: list(islice(updates, batch_size)), [])
+    counts = await run_bounded((_update_salary_batch(pool, batch) for batch in batches), concurrency)
+    return sum(counts)
+
+# Function to measure requests/sec of point reads and updates under concurrent load.
+# The load runs against a scratch copy of the employees table, dropped afterwards,
+# so the benchmark writes never touch real salaries. write_ratio=0 makes it read-only.
+async def benchmark(pool, num_requests=10000, concurrency=100, write_ratio=0.2,
+                    table="employees_benchmark"):
+    async with pool.acquire() as connection, connection.cursor() as cursor:
+        await cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        await cursor.execute(f"CREATE TABLE {table} LIKE employees")
+        await cursor.execute(f"INSERT INTO {table} SELECT * FROM employees")
+        await connection.commit()
+        await cursor.execute(f"SELECT id FROM {table}")
+        ids = [row['id'] for row in await cursor.fetchall()]
+
+    async def point_read(employee_id):
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(f"SELECT * FROM {table} WHERE id = %s", (employee_id,))
+            return await cursor.fetchone()
+
+    async def point_update(employee_id):
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(f"UPDATE {table} SET salary = %s WHERE id = %s",
+                                 (round(random.uniform(40000, 120000), 2), employee_id))
+            await connection.commit()
+            return cursor.rowcount
+
+    def request():
+        employee_id = random.choice(ids)
+        if random.random() < write_ratio:
+            return point_update(employee_id)
+        return point_read(employee_id)
+
+    try:
+        if not ids:
+            print("No employees to benchmark against.")
+            return 0.0
+        start = time.perf_counter()
+        await run_bounded((request() for _ in range(num_requests)), concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        async with pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            await connection.commit()
+    rate = num_requests / elapsed
+    print(f"{num_requests} requests with concurrency {concurrency} and {write_ratio:.0%} writes "
+          f"in {elapsed:.2f}s ({rate:,.0f} requests/sec)")
+    return rate
+
+# Main function to demonstrate the usage
+async def main():
+    pool = await create_pool(minsize=1, maxsize=20)
+    if not pool:
+        return
+
+    try:
+        await create_table(pool)
+
+        # Insert employees concurrently
+        ids = await run_bounded((insert_data(pool, f"Employee {i}", "Analyst", 50000.00 + i)
+                                 for i in range(1000)), limit=20)
+        print(f"Inserted {len([i for i in ids if i is not None])} employees")
+
+        # Raise the salaries of the employees inserted above by 5% with batched CASE updates
+        inserted = {employee_id for employee_id in ids if employee_id is not None}
+        employees = await query_data(pool)
+        raises = {row['id']: float(row['salary']) * 1.05 for row in employees if row['id'] in inserted}
+        updated = await batch_update_salaries(pool, raises, batch_size=500, concurrency=4)
+        print(f"Updated {updated} salaries in batches")
+
+        # Measure throughput under concurrent load, on a scratch copy of the table
+        await benchmark(pool, num_requests=10000, concurrency=100)
+
+        # Delete an employee
+        await delete_data(pool, ids[0])
+    finally:
+        pool.close()
+        await pool.wait_closed()
+        print("Database connection pool closed.")
+
+# Run the script
+if __name__ == "__main__":
+    asyncio.run(main())
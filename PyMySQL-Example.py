@@ -1,3 +1,9 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+
 import pymysql
 
 # Database connection details
@@ -6,6 +12,11 @@ user = "your_username"
 password = "your_password"
 database = "your_database"
 
+# Parameterized statements for the hot point operations, built once and reused
+SELECT_EMPLOYEE_SQL = "SELECT * FROM employees WHERE id = %s"
+UPDATE_SALARY_SQL = "UPDATE employees SET salary = %s WHERE id = %s"
+DELETE_EMPLOYEE_SQL = "DELETE FROM employees WHERE id = %s"
+
 # Function to establish a database connection
 def connect_to_database():
     try:
@@ -22,10 +33,182 @@ def connect_to_database():
         print(f"Error connecting to the database: {e}")
         return None
 
+# Thread-safe pool of reusable database connections
+class ConnectionPool:
+    def __init__(self, min_size=1, max_size=10, max_idle_time=300, borrow_timeout=30,
+                 connect=pymysql.connect, **connect_kwargs):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time    # Seconds an idle connection above min_size is kept
+        self.borrow_timeout = borrow_timeout  # Seconds to wait for a free connection
+        self._connect = connect
+        self._connect_kwargs = connect_kwargs
+        self._idle = []  # (connection, time it was returned), most recently used last
+        self._active = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self.created = 0
+        self.discarded = 0
+        self.evicted = 0
+        self.borrows = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+        for _ in range(min_size):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        connection = self._connect(**self._connect_kwargs)
+        self.created += 1
+        return connection
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except pymysql.Error:
+            pass
+
+    def _is_healthy(self, connection):
+        # Health check on borrow: a round trip without reconnecting behind the pool's back
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except pymysql.Error:
+            return False
+
+    def _evict_idle(self, now):
+        # Close connections idle for longer than max_idle_time, keeping min_size open
+        keep = []
+        for connection, returned_at in reversed(self._idle):
+            if len(keep) + self._active >= self.min_size and now - returned_at > self.max_idle_time:
+                self._close_quietly(connection)
+                self.evicted += 1
+            else:
+                keep.append((connection, returned_at))
+        self._idle = keep[::-1]
+
+    def acquire(self):
+        # Borrow a healthy connection, waiting up to borrow_timeout for one to free up
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise pymysql.InterfaceError("connection pool is closed")
+                self._evict_idle(time.monotonic())
+                if self._idle:
+                    connection, _ = self._idle.pop()
+                    break
+                if self._active < self.max_size:
+                    connection = None
+                    break
+                remaining = self.borrow_timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise pymysql.OperationalError("timed out waiting for a pooled connection")
+                self._condition.wait(remaining)
+            self._active += 1
+
+        # Connect and health-check outside the lock so other threads are not blocked
+        try:
+            if connection is not None and not self._is_healthy(connection):
+                self._close_quietly(connection)
+                self.discarded += 1
+                connection = None
+            if connection is None:
+                connection = self._new_connection()
+        except BaseException:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._condition:
+            self.borrows += 1
+            self.total_wait_time += wait
+            self.max_wait_time = max(self.max_wait_time, wait)
+        return connection
+
+    def release(self, connection, discard=False):
+        # Return a connection to the pool, rolling back anything left uncommitted
+        if not discard:
+            try:
+                connection.rollback()
+            except pymysql.Error:
+                discard = True
+        with self._condition:
+            self._active -= 1
+            if discard or self._closed:
+                self._close_quietly(connection)
+                if discard:
+                    self.discarded += 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        # Borrow a connection for the duration of a with block
+        connection = self.acquire()
+        try:
+            yield connection
+        except pymysql.OperationalError:
+            self.release(connection, discard=True)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'active': self._active,
+                'idle': len(self._idle),
+                'created': self.created,
+                'discarded': self.discarded,
+                'evicted': self.evicted,
+                'borrows': self.borrows,
+                'avg_wait_time': self.total_wait_time / self.borrows if self.borrows else 0.0,
+                'max_wait_time': self.max_wait_time,
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+            self._idle = []
+            self._condition.notify_all()
+
+# Function to create a connection pool with the module's connection details
+def create_pool(min_size=1, max_size=10, **pool_options):
+    try:
+        pool = ConnectionPool(min_size, max_size, host=host, user=user, password=password, database=database,
+                              cursorclass=pymysql.cursors.DictCursor, **pool_options)
+        print("Connection pool created successfully!")
+        return pool
+    except pymysql.Error as e:
+        print(f"Error creating the connection pool: {e}")
+        return None
+
+# Borrow a connection from a pool, or use a plain connection as it is
+@contextmanager
+def borrow(connection):
+    if isinstance(connection, ConnectionPool):
+        with connection.connection() as pooled:
+            yield pooled
+    else:
+        yield connection
+
 # Function to create a table
 def create_table(connection):
     try:
-        with connection.cursor() as cursor:
+        with borrow(connection) as conn, conn.cursor() as cursor:
             sql = """
             CREATE TABLE IF NOT EXISTS employees (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -35,7 +218,7 @@ def create_table(connection):
             )
             """
             cursor.execute(sql)
-            connection.commit()
+            conn.commit()
             print("Table 'employees' created successfully!")
     except pymysql.Error as e:
         print(f"Error creating table: {e}")
@@ -43,53 +226,222 @@ def create_table(connection):
 # Function to insert data into the table
 def insert_data(connection, name, position, salary):
     try:
-        with connection.cursor() as cursor:
+        with borrow(connection) as conn, conn.cursor() as cursor:
             sql = "INSERT INTO employees (name, position, salary) VALUES (%s, %s, %s)"
             cursor.execute(sql, (name, position, salary))
-            connection.commit()
+            conn.commit()
             print(f"Inserted data for {name} successfully!")
     except pymysql.Error as e:
         print(f"Error inserting data: {e}")
 
+# Function to bulk insert (name, position, salary) rows, one commit per batch
+def bulk_insert_data(connection, rows, batch_size=1000):
+    # rows can be any iterable, including a generator or a DataFrame with
+    # name, position and salary columns. It is consumed batch by batch, so
+    # memory use does not grow with the number of rows.
+    if hasattr(rows, 'itertuples'):
+        rows = rows[['name', 'position', 'salary']].itertuples(index=False, name=None)
+    rows = iter(rows)
+    inserted = 0
+    start = time.perf_counter()
+    try:
+        with borrow(connection) as conn, conn.cursor() as cursor:
+            # PyMySQL turns executemany on INSERT ... VALUES into multi-row statements
+            sql = "INSERT INTO employees (name, position, salary) VALUES (%s, %s, %s)"
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor.executemany(sql, batch)
+                conn.commit()
+                inserted += len(batch)
+    except pymysql.Error as e:
+        print(f"Error bulk inserting data after {inserted} rows: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"Bulk inserted {inserted} rows in {elapsed:.2f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return inserted
+
 # Function to query all data from the table
 def query_data(connection):
+    # Rows are streamed from the server rather than buffered with fetchall
+    print("Employees:")
+    for row in stream_query(connection, "SELECT * FROM employees"):
+        print(row)
+
+# Function to stream query results with a server-side (unbuffered) cursor
+def stream_query(connection, sql="SELECT * FROM employees", params=None, chunk_size=None,
+                 as_dataframe=False, dict_rows=True):
+    # Rows are pulled from the server as they are consumed instead of being
+    # buffered with fetchall, so memory stays constant regardless of the
+    # result size. Yields single rows, or lists of up to chunk_size rows, or
+    # pandas DataFrames of up to chunk_size rows when as_dataframe is set.
+    if as_dataframe:
+        import pandas as pd
+        chunk_size = chunk_size or 10000
+    cursor_class = pymysql.cursors.SSDictCursor if dict_rows or as_dataframe else pymysql.cursors.SSCursor
     try:
-        with connection.cursor() as cursor:
-            sql = "SELECT * FROM employees"
-            cursor.execute(sql)
-            results = cursor.fetchall()
-            print("Employees:")
-            for row in results:
-                print(row)
+        with borrow(connection) as conn, conn.cursor(cursor_class) as cursor:
+            cursor.execute(sql, params)
+            if chunk_size is None:
+                yield from cursor.fetchall_unbuffered()
+                return
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows) if as_dataframe else rows
     except pymysql.Error as e:
-        print(f"Error querying data: {e}")
+        print(f"Error streaming query results: {e}")
+
+# Function to fetch one page of employees after a given id (keyset pagination)
+def fetch_employee_page(connection, after_id=0, page_size=1000):
+    # Seeks straight to the page through the primary key index instead of
+    # scanning and discarding rows like OFFSET. Returns the rows and the id
+    # to pass as after_id for the next page, or None after the last page.
+    try:
+        with borrow(connection) as conn, conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            sql = "SELECT * FROM employees WHERE id > %s ORDER BY id LIMIT %s"
+            cursor.execute(sql, (after_id, page_size))
+            rows = cursor.fetchall()
+    except pymysql.Error as e:
+        print(f"Error fetching employee page: {e}")
+        return [], None
+    next_after_id = rows[-1]['id'] if len(rows) == page_size else None
+    return rows, next_after_id
+
+# Function to iterate over all employees page by page
+def iter_employee_pages(connection, page_size=1000, after_id=0):
+    # Each page is a separate short query, so no connection or cursor is
+    # held open between pages
+    while after_id is not None:
+        rows, after_id = fetch_employee_page(connection, after_id, page_size)
+        if rows:
+            yield rows
+
+# Thread-safe LRU cache with a TTL for employee rows looked up by id
+class EmployeeCache:
+    def __init__(self, capacity=10000, ttl=60):
+        self.capacity = capacity
+        self.ttl = ttl  # Seconds a cached row is served before it is read again
+        self._rows = OrderedDict()  # employee_id -> (row, time it was cached)
+        self._versions = {}  # employee_id -> number of times it was invalidated
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.db_round_trips = 0
+
+    def get(self, employee_id):
+        # Return (True, row) on a fresh hit, (False, None) otherwise
+        with self._lock:
+            entry = self._rows.get(employee_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._rows.move_to_end(employee_id)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._rows[employee_id]
+            self.misses += 1
+            return False, None
+
+    def version(self, employee_id):
+        # Take this before reading a row from the database and pass it to put
+        with self._lock:
+            return self._versions.get(employee_id, 0)
+
+    def put(self, employee_id, row, version=None):
+        with self._lock:
+            # A row read before a concurrent invalidate is stale, so it is not cached
+            if version is not None and version != self._versions.get(employee_id, 0):
+                return False
+            self._rows[employee_id] = (row, time.monotonic())
+            self._rows.move_to_end(employee_id)
+            while len(self._rows) > self.capacity:
+                self._rows.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def record_round_trip(self):
+        with self._lock:
+            self.db_round_trips += 1
+
+    def invalidate(self, employee_id):
+        with self._lock:
+            self._versions[employee_id] = self._versions.get(employee_id, 0) + 1
+            if self._rows.pop(employee_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._rows),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'db_round_trips': self.db_round_trips,
+            }
+
+# Default cache shared by get_employee and invalidated by update_data and delete_data
+employee_cache = EmployeeCache()
+
+# Function to read one employee by id, served from the cache when possible
+def get_employee(connection, employee_id, cache=None):
+    cache = employee_cache if cache is None else cache
+    found, row = cache.get(employee_id)
+    if found:
+        return row
+    version = cache.version(employee_id)
+    try:
+        with borrow(connection) as conn, conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute(SELECT_EMPLOYEE_SQL, (employee_id,))
+            row = cursor.fetchone()
+            cache.record_round_trip()
+    except pymysql.Error as e:
+        print(f"Error reading employee {employee_id}: {e}")
+        return None
+    # Only existing rows are cached, so ids inserted later are never hidden
+    if row is not None:
+        cache.put(employee_id, row, version)
+    return row
 
 # Function to update data in the table
-def update_data(connection, employee_id, new_salary):
+def update_data(connection, employee_id, new_salary, cache=None):
+    cache = employee_cache if cache is None else cache
     try:
-        with connection.cursor() as cursor:
-            sql = "UPDATE employees SET salary = %s WHERE id = %s"
-            cursor.execute(sql, (new_salary, employee_id))
-            connection.commit()
+        with borrow(connection) as conn, conn.cursor() as cursor:
+            cursor.execute(UPDATE_SALARY_SQL, (new_salary, employee_id))
+            conn.commit()
+            cache.invalidate(employee_id)
             print(f"Updated salary for employee ID {employee_id} successfully!")
     except pymysql.Error as e:
         print(f"Error updating data: {e}")
 
 # Function to delete data from the table
-def delete_data(connection, employee_id):
+def delete_data(connection, employee_id, cache=None):
+    cache = employee_cache if cache is None else cache
     try:
-        with connection.cursor() as cursor:
-            sql = "DELETE FROM employees WHERE id = %s"
-            cursor.execute(sql, (employee_id))
-            connection.commit()
+        with borrow(connection) as conn, conn.cursor() as cursor:
+            cursor.execute(DELETE_EMPLOYEE_SQL, (employee_id,))
+            conn.commit()
+            cache.invalidate(employee_id)
             print(f"Deleted employee with ID {employee_id} successfully!")
     except pymysql.Error as e:
         print(f"Error deleting data: {e}")
 
 # Main function to demonstrate the usage
 def main():
-    # Connect to the database
-    connection = connect_to_database()
+    # Create a pool; every helper borrows a connection from it per call
+    connection = create_pool(min_size=1, max_size=5)
     if not connection:
         return
 
@@ -101,12 +453,29 @@ def main():
         insert_data(connection, "John Doe", "Software Engineer", 75000.00)
         insert_data(connection, "Jane Smith", "Data Scientist", 85000.00)
 
+        # Bulk insert generated rows in batches
+        generated = ((f"Employee {i}", "Analyst", 50000.00 + i) for i in range(10000))
+        bulk_insert_data(connection, generated, batch_size=1000)
+
         # Query and display all data
         query_data(connection)
 
+        # Stream the table in chunks without buffering it in memory
+        streamed = sum(len(chunk) for chunk in stream_query(connection, chunk_size=1000))
+        print(f"Streamed {streamed} employees")
+
+        # Walk the table with keyset pagination
+        pages = sum(1 for _ in iter_employee_pages(connection, page_size=2500))
+        print(f"Read the table in {pages} pages")
+
         # Update an employee's salary
         update_data(connection, 1, 80000.00)
 
+        # Repeated point lookups are served from the cache after the first read
+        for _ in range(3):
+            print(get_employee(connection, 1))
+        print(f"Employee cache stats: {employee_cache.stats()}")
+
         # Query and display all data after update
         query_data(connection)
 
@@ -117,9 +486,10 @@ def main():
         query_data(connection)
 
     finally:
-        # Close the database connection
+        # Close the pooled database connections
+        print(f"Connection pool stats: {connection.stats()}")
         connection.close()
-        print("Database connection closed.")
+        print("Database connection pool closed.")
 
 # Run the script
 if __name__ == "__main__":
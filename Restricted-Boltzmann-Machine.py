@@ -1,15 +1,32 @@
+import os
+import sys
+import tempfile
+import time
 import numpy as np
+from boltzmann_utils import load_checkpoint, pack_binary_dataset, read_rows, restore_rng, save_checkpoint
 
 class RestrictedBoltzmannMachine:
 
-    def __init__(self, num_visible, num_hidden):
+    def __init__(self, num_visible, num_hidden, seed=None, dtype=np.float64):
         self.num_visible = num_visible
         self.num_hidden = num_hidden
+        self.dtype = np.dtype(dtype)  # np.float32 halves memory and speeds up the GEMMs
+
+        # Random generator owned by this model, so seeded runs are reproducible
+        self.rng = np.random.default_rng(seed)
 
         # Initialize weights and biases
-        self.weights = np.random.randn(num_visible, num_hidden) * 0.1
-        self.visible_bias = np.zeros(num_visible)  # Bias for visible layer
-        self.hidden_bias = np.zeros(num_hidden)    # Bias for hidden layer
+        self.weights = (self.rng.standard_normal((num_visible, num_hidden)) * 0.1).astype(self.dtype)
+        self.visible_bias = np.zeros(num_visible, dtype=self.dtype)  # Bias for visible layer
+        self.hidden_bias = np.zeros(num_hidden, dtype=self.dtype)    # Bias for hidden layer
+
+        # Momentum terms used by the mini-batch trainer
+        self.weights_velocity = np.zeros_like(self.weights)
+        self.visible_bias_velocity = np.zeros_like(self.visible_bias)
+        self.hidden_bias_velocity = np.zeros_like(self.hidden_bias)
+
+        # Persistent Gibbs chains (chains x visible) used by PCD training
+        self.fantasy_particles = None
 
     def sample_hidden(self, visible):
         # Calculate activations of the hidden layer
@@ -17,7 +34,7 @@ class RestrictedBoltzmannMachine:
         # Calculate probabilities of turning the hidden units on.
         hidden_probs = self._sigmoid(hidden_activations)
         # Turn the hidden units on with their specific probabilities
-        hidden_states = (hidden_probs > np.random.rand(self.num_hidden)).astype(int)
+        hidden_states = (hidden_probs > self.rng.random(hidden_probs.shape)).astype(int)
         return hidden_states
 
     def sample_visible(self, hidden):
@@ -26,18 +43,16 @@ class RestrictedBoltzmannMachine:
         # Calculate probabilities of turning the visible units on.
         visible_probs = self._sigmoid(visible_activations)
         # Turn the visible units on with their specific probabilities
-        visible_states = (visible_probs > np.random.rand(self.num_visible)).astype(int)
+        visible_states = (visible_probs > self.rng.random(visible_probs.shape)).astype(int)
         return visible_states
 
     def train(self, data, epochs, learning_rate):
         num_samples = data.shape[0]
 
         for epoch in range(epochs):
-            # Randomize the order of inputs
-            np.random.shuffle(data)
-
-            for sample in data:
-                v0 = np.array(sample)  # Start with a training sample
+            # Randomize the order of inputs without reordering the data itself
+            for i in self.rng.permutation(num_samples):
+                v0 = np.array(data[i])  # Start with a training sample
 
                 # Contrastive Divergence
                 h0 = self.sample_hidden(v0)
@@ -49,17 +64,415 @@ class RestrictedBoltzmannMachine:
                 self.visible_bias += learning_rate * (v0 - v1) / num_samples
                 self.hidden_bias += learning_rate * (h0 - h1) / num_samples
 
+    def hidden_probabilities(self, visible):
+        # Probabilities of the hidden units for a (batch x visible) matrix
+        return self._sigmoid(visible @ self.weights + self.hidden_bias)
+
+    def visible_probabilities(self, hidden):
+        # Probabilities of the visible units for a (batch x hidden) matrix
+        return self._sigmoid(hidden @ self.weights.T + self.visible_bias)
+
+    def _sample(self, probs):
+        # Turn every unit of the batch on with its own probability
+        return (probs > self.rng.random(probs.shape)).astype(probs.dtype)
+
+    def _apply_gradients(self, v_pos, h_pos, v_neg, h_neg, learning_rate, momentum, weight_decay):
+        # Average each phase over its own rows with single GEMMs, since PCD
+        # may run a different number of chains than there are batch samples
+        num_pos, num_neg = v_pos.shape[0], v_neg.shape[0]
+        grad_weights = v_pos.T @ h_pos / num_pos - v_neg.T @ h_neg / num_neg - weight_decay * self.weights
+        grad_visible = v_pos.mean(axis=0) - v_neg.mean(axis=0)
+        grad_hidden = h_pos.mean(axis=0) - h_neg.mean(axis=0)
+
+        self.weights_velocity = momentum * self.weights_velocity + learning_rate * grad_weights
+        self.visible_bias_velocity = momentum * self.visible_bias_velocity + learning_rate * grad_visible
+        self.hidden_bias_velocity = momentum * self.hidden_bias_velocity + learning_rate * grad_hidden
+
+        self.weights += self.weights_velocity
+        self.visible_bias += self.visible_bias_velocity
+        self.hidden_bias += self.hidden_bias_velocity
+
+    def train_minibatch(self, data, epochs, learning_rate, batch_size=32, k=1, momentum=0.5, weight_decay=0.0,
+                        packed=False):
+        """
+        Train with mini-batch contrastive divergence (CD-k).
+
+        Each batch is processed as a (batch x visible) matrix, so the Gibbs
+        steps and the weight gradient are single matrix products, and all
+        hidden and visible units of the batch are sampled at once. The data
+        is never copied or modified as a whole; batches are read through a
+        shuffled index, so an np.memmap larger than memory works.
+
+        Parameters:
+        data : numpy.ndarray or numpy.memmap
+            Binary training data with shape (samples x visible), or bit-packed
+            rows when packed is True.
+        epochs : int
+            Number of passes over the data.
+        learning_rate : float
+            Step size of the updates.
+        batch_size : int, optional
+            Number of samples per update. Default is 32.
+        k : int, optional
+            Number of Gibbs steps per update. Default is 1.
+        momentum : float, optional
+            Fraction of the previous update carried over. Default is 0.5.
+        weight_decay : float, optional
+            L2 penalty on the weights. Default is 0.
+        packed : bool, optional
+            Whether data holds np.packbits rows. Default is False.
+        """
+        num_samples = data.shape[0]
+
+        for epoch in range(epochs):
+            order = self.rng.permutation(num_samples)
+            for start in range(0, num_samples, batch_size):
+                v0 = read_rows(data, order[start:start + batch_size], self.num_visible, packed, self.dtype)
+
+                # Positive phase
+                h0_probs = self.hidden_probabilities(v0)
+                h = self._sample(h0_probs)
+
+                # Negative phase: k steps of block Gibbs sampling
+                for _ in range(k):
+                    v = self._sample(self.visible_probabilities(h))
+                    h_probs = self.hidden_probabilities(v)
+                    h = self._sample(h_probs)
+
+                self._apply_gradients(v0, h0_probs, v, h_probs, learning_rate, momentum, weight_decay)
+
+    def gibbs_step(self, visible):
+        """
+        Advance every chain by one block Gibbs step.
+
+        Parameters:
+        visible : numpy.ndarray
+            Visible states with shape (chains x visible).
+
+        Returns:
+        tuple
+            New visible states and the hidden probabilities given them.
+        """
+        hidden = self._sample(self.hidden_probabilities(visible))
+        visible = self._sample(self.visible_probabilities(hidden))
+        return visible, self.hidden_probabilities(visible)
+
+    def train_pcd(self, data, epochs, learning_rate, batch_size=32, num_chains=100, k=1,
+                  momentum=0.5, weight_decay=0.0, packed=False):
+        """
+        Train with persistent contrastive divergence (PCD-k).
+
+        Instead of restarting the negative phase from the data, a set of
+        fantasy particles is kept alive across updates and across calls. All
+        chains advance together, one matrix product per half Gibbs step.
+
+        Parameters:
+        data : numpy.ndarray or numpy.memmap
+            Binary training data with shape (samples x visible), or bit-packed
+            rows when packed is True.
+        epochs : int
+            Number of passes over the data.
+        learning_rate : float
+            Step size of the updates.
+        batch_size : int, optional
+            Number of data samples per update. Default is 32.
+        num_chains : int, optional
+            Number of persistent Gibbs chains. Default is 100.
+        k : int, optional
+            Number of Gibbs steps per update. Default is 1.
+        momentum : float, optional
+            Fraction of the previous update carried over. Default is 0.5.
+        weight_decay : float, optional
+            L2 penalty on the weights. Default is 0.
+        packed : bool, optional
+            Whether data holds np.packbits rows. Default is False.
+        """
+        num_samples = data.shape[0]
+
+        # Start (or restart, if the chain count changed) the chains from random data rows
+        if self.fantasy_particles is None or self.fantasy_particles.shape[0] != num_chains:
+            rows = self.rng.integers(0, num_samples, num_chains)
+            self.fantasy_particles = read_rows(data, rows, self.num_visible, packed, self.dtype)
+
+        for epoch in range(epochs):
+            order = self.rng.permutation(num_samples)
+            for start in range(0, num_samples, batch_size):
+                v0 = read_rows(data, order[start:start + batch_size], self.num_visible, packed, self.dtype)
+
+                # Negative phase: advance the persistent chains
+                chains = self.fantasy_particles
+                for _ in range(k):
+                    chains, chain_hidden_probs = self.gibbs_step(chains)
+                self.fantasy_particles = chains
+
+                self._apply_gradients(v0, self.hidden_probabilities(v0), chains, chain_hidden_probs,
+                                      learning_rate, momentum, weight_decay)
+
+    def energy(self, visible, hidden):
+        """
+        Energy of a batch of joint states.
+
+        Parameters:
+        visible : numpy.ndarray
+            Visible states with shape (batch x visible) or (visible,).
+        hidden : numpy.ndarray
+            Hidden states with shape (batch x hidden) or (hidden,).
+
+        Returns:
+        numpy.ndarray
+            E(v, h) = -v.b - h.c - v W h for every state.
+        """
+        return (-visible @ self.visible_bias - hidden @ self.hidden_bias
+                - np.sum((visible @ self.weights) * hidden, axis=-1))
+
+    def free_energy(self, visible):
+        """
+        Free energy of a batch of visible states, with the hidden units summed out.
+
+        Parameters:
+        visible : numpy.ndarray
+            Visible states with shape (batch x visible) or (visible,).
+
+        Returns:
+        numpy.ndarray
+            F(v) = -v.b - sum_j log(1 + exp(v W_j + c_j)) for every state.
+        """
+        return -visible @ self.visible_bias - np.sum(np.logaddexp(0, visible @ self.weights + self.hidden_bias), axis=-1)
+
+    def estimate_log_partition(self, num_chains=100, num_betas=1000, base_data=None):
+        """
+        Estimate log Z with annealed importance sampling (Salakhutdinov & Murray, 2008).
+
+        All chains run together as a (chains x visible) matrix. The base model
+        has no weights and, when base_data is given, visible biases matching
+        the data marginals, which shortens the annealing path.
+
+        Parameters:
+        num_chains : int, optional
+            Number of AIS runs. Default is 100.
+        num_betas : int, optional
+            Number of intermediate distributions. Default is 1000.
+        base_data : array_like, optional
+            Data used to set the base model's visible biases.
+
+        Returns:
+        tuple
+            (log Z estimate, standard deviation of the log importance weights).
+        """
+        if base_data is None:
+            base_bias = np.zeros(self.num_visible)
+        else:
+            marginals = np.clip(np.mean(base_data, axis=0), 0.05, 0.95)
+            base_bias = np.log(marginals / (1 - marginals))
+        base_log_z = np.sum(np.logaddexp(0, base_bias)) + self.num_hidden * np.log(2)
+
+        def log_unnormalized(v, beta):
+            # Hidden units summed out of the interpolated model at inverse temperature beta
+            return ((1 - beta) * v @ base_bias + beta * v @ self.visible_bias
+                    + np.sum(np.logaddexp(0, beta * (v @ self.weights + self.hidden_bias)), axis=-1))
+
+        betas = np.linspace(0.0, 1.0, num_betas)
+        v = (self.rng.random((num_chains, self.num_visible)) < self._sigmoid(base_bias)).astype(np.float64)
+        log_weights = np.zeros(num_chains)
+        for previous, beta in zip(betas[:-1], betas[1:]):
+            log_weights += log_unnormalized(v, beta) - log_unnormalized(v, previous)
+
+            # One Gibbs step that leaves the intermediate distribution at beta invariant
+            hidden_probs = self._sigmoid(beta * (v @ self.weights + self.hidden_bias))
+            h = (self.rng.random(hidden_probs.shape) < hidden_probs).astype(np.float64)
+            visible_probs = self._sigmoid((1 - beta) * base_bias + beta * (h @ self.weights.T + self.visible_bias))
+            v = (self.rng.random(visible_probs.shape) < visible_probs).astype(np.float64)
+
+        # log of the mean importance weight, computed stably
+        log_mean_weight = np.logaddexp.reduce(log_weights) - np.log(num_chains)
+        return float(base_log_z + log_mean_weight), float(np.std(log_weights))
+
+    def log_likelihood(self, data, log_z=None, **ais_options):
+        """
+        Average log-likelihood of a batch of visible states.
+
+        Parameters:
+        data : array_like
+            Visible states with shape (batch x visible).
+        log_z : float, optional
+            Log partition function. Estimated with AIS when omitted.
+        **ais_options
+            Passed to estimate_log_partition.
+
+        Returns:
+        float
+            Mean of -F(v) - log Z over the batch.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if log_z is None:
+            log_z, _ = self.estimate_log_partition(base_data=data, **ais_options)
+        return float(np.mean(-self.free_energy(data)) - log_z)
+
+    def save(self, path):
+        """
+        Save parameters, momentum, persistent chains and RNG state to a checkpoint directory.
+
+        Parameters:
+        path : str
+            Directory to write the checkpoint to.
+        """
+        arrays = {
+            'weights': self.weights,
+            'visible_bias': self.visible_bias,
+            'hidden_bias': self.hidden_bias,
+            'weights_velocity': self.weights_velocity,
+            'visible_bias_velocity': self.visible_bias_velocity,
+            'hidden_bias_velocity': self.hidden_bias_velocity,
+        }
+        if self.fantasy_particles is not None:
+            arrays['fantasy_particles'] = self.fantasy_particles
+        state = {'num_visible': self.num_visible, 'num_hidden': self.num_hidden, 'dtype': self.dtype.name,
+                 'rng_state': self.rng.bit_generator.state}
+        save_checkpoint(path, arrays, state)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Load a model saved with save, memory-mapping its arrays.
+
+        With the default read-only mapping, loading takes milliseconds and
+        every process using the checkpoint shares the same weight pages,
+        which suits inference. Use mmap_mode='c' (copy-on-write) or None to
+        continue training.
+
+        Parameters:
+        path : str
+            Checkpoint directory.
+        mmap_mode : str or None, optional
+            Passed to np.load. Default is 'r'.
+
+        Returns:
+        RestrictedBoltzmannMachine
+            The restored model.
+        """
+        state, arrays = load_checkpoint(path, mmap_mode)
+        rbm = cls.__new__(cls)  # Skip the random initialization
+        rbm.num_visible = state['num_visible']
+        rbm.num_hidden = state['num_hidden']
+        rbm.dtype = np.dtype(state['dtype'])
+        rbm.rng = restore_rng(state['rng_state'])
+        rbm.fantasy_particles = None
+        for name, array in arrays.items():
+            setattr(rbm, name, array)
+        return rbm
+
     def _sigmoid(self, x):
         return 1 / (1 + np.exp(-x))
 
-# Example usage
-num_visible = 6  # Number of visible nodes
-num_hidden = 3   # Number of hidden nodes
 
-rbm = RestrictedBoltzmannMachine(num_visible, num_hidden)
+def train_with_monitoring(rbm, data, epochs, learning_rate, monitor_every=100, method='minibatch',
+                          monitor_data=None, ais_chains=100, ais_betas=500, **train_options):
+    """
+    Train an RBM and estimate its log-likelihood every monitor_every epochs.
+
+    Training runs in blocks of monitor_every epochs; momentum and persistent
+    chains live on the model, so the blocks continue seamlessly. Between
+    blocks the vectorized AIS estimator scores monitor_data.
+
+    Parameters:
+    rbm : RestrictedBoltzmannMachine
+        The model to train.
+    data : array_like
+        Training data.
+    epochs, learning_rate :
+        Passed to the trainer.
+    monitor_every : int, optional
+        Epochs between log-likelihood estimates. Default is 100.
+    method : str, optional
+        'minibatch' or 'pcd'. Default is 'minibatch'.
+    monitor_data : array_like, optional
+        Unpacked data to score. Defaults to the training data.
+    ais_chains, ais_betas : int, optional
+        AIS chains and intermediate distributions used for monitoring,
+        passed to estimate_log_partition as num_chains and num_betas.
+    **train_options
+        Further options for the trainer, e.g. num_chains for 'pcd'.
+
+    Returns:
+    list of tuple
+        (epochs trained, estimated average log-likelihood) per checkpoint.
+    """
+    trainer = {'minibatch': rbm.train_minibatch, 'pcd': rbm.train_pcd}[method]
+    monitor_data = np.asarray(data if monitor_data is None else monitor_data, dtype=np.float64)
+    history = []
+    done = 0
+    while done < epochs:
+        block = min(monitor_every, epochs - done)
+        trainer(data, block, learning_rate, **train_options)
+        done += block
+        log_z, _ = rbm.estimate_log_partition(ais_chains, ais_betas, base_data=monitor_data)
+        history.append((done, rbm.log_likelihood(monitor_data, log_z)))
+        print(f"Epoch {done}: log-likelihood {history[-1][1]:.4f}")
+    return history
+
+
+def benchmark_training(num_samples=2000, num_visible=64, num_hidden=32, epochs=3, batch_size=64):
+    """
+    Compare training throughput of the per-sample loop and the mini-batch trainer.
+
+    Parameters:
+    num_samples, num_visible, num_hidden : int, optional
+        Size of the random binary data set and the model.
+    epochs : int, optional
+        Number of epochs timed for each trainer.
+    batch_size : int, optional
+        Batch size of the mini-batch trainer.
+    """
+    data = np.random.randint(2, size=(num_samples, num_visible))
+    trainers = {
+        'per-sample loop': lambda rbm: rbm.train(data.copy(), epochs, 0.05),
+        f'mini-batch ({batch_size})': lambda rbm: rbm.train_minibatch(data, epochs, 0.05, batch_size=batch_size),
+    }
+    for name, train in trainers.items():
+        rbm = RestrictedBoltzmannMachine(num_visible, num_hidden)
+        start = time.perf_counter()
+        train(rbm)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>18}: {num_samples * epochs / elapsed:,.0f} samples/sec")
+
+if __name__ == '__main__':
+    # Example usage
+    num_visible = 6  # Number of visible nodes
+    num_hidden = 3   # Number of hidden nodes
+
+    rbm = RestrictedBoltzmannMachine(num_visible, num_hidden)
+
+    # Example data: 6 binary features
+    data = np.random.randint(2, size=(10, num_visible))
+
+    # Train the RBM
+    rbm.train(data, epochs=5000, learning_rate=0.05)
+
+    # Train a second RBM with mini-batch CD-1, momentum and weight decay
+    rbm_batch = RestrictedBoltzmannMachine(num_visible, num_hidden)
+    rbm_batch.train_minibatch(data, epochs=5000, learning_rate=0.05, batch_size=10, momentum=0.5, weight_decay=1e-4)
+
+    # Persistent contrastive divergence with 50 chains, reproducible through the seed
+    rbm_pcd = RestrictedBoltzmannMachine(num_visible, num_hidden, seed=42)
+    rbm_pcd.train_pcd(data, epochs=1000, learning_rate=0.05, batch_size=10, num_chains=50, k=1)
+
+    # Train in float32 from a bit-packed, memory-mapped copy of the data
+    packed_data = pack_binary_dataset(data, os.path.join(tempfile.gettempdir(), 'rbm_packed_data.npy'))
+    rbm_packed = RestrictedBoltzmannMachine(num_visible, num_hidden, seed=42, dtype=np.float32)
+    rbm_packed.train_minibatch(packed_data, epochs=1000, learning_rate=0.05, batch_size=10, packed=True)
+
+    # Track the log-likelihood of a PCD run every 200 epochs
+    rbm_monitored = RestrictedBoltzmannMachine(num_visible, num_hidden, seed=7)
+    train_with_monitoring(rbm_monitored, data, epochs=1000, learning_rate=0.05, monitor_every=200, method='pcd',
+                          batch_size=10, num_chains=50)
 
-# Example data: 6 binary features
-data = np.random.randint(2, size=(10, num_visible))
+    # Save a checkpoint and load it back memory-mapped for inference
+    checkpoint_dir = os.path.join(tempfile.gettempdir(), 'rbm_checkpoint')
+    rbm_monitored.save(checkpoint_dir)
+    rbm_loaded = RestrictedBoltzmannMachine.load(checkpoint_dir)
+    print("Reloaded free energies match:", np.allclose(rbm_loaded.free_energy(data), rbm_monitored.free_energy(data)))
 
-# Train the RBM
-rbm.train(data, epochs=5000, learning_rate=0.05)
+    # The throughput benchmark trains several models for a while, so it only
+    # runs on request: python Restricted-Boltzmann-Machine.py --benchmark
+    if '--benchmark' in sys.argv[1:]:
+        benchmark_training()
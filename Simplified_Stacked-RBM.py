@@ -1,46 +1,147 @@
+import os
+import tempfile
+import time
 import numpy as np
+from boltzmann_utils import load_checkpoint, pack_binary_dataset, read_rows, restore_rng, save_checkpoint
 from keras.datasets import mnist
 import matplotlib.pyplot as plt
 
 # Restricted Boltzmann Machine (RBM) Class
 class RBM:
-    def __init__(self, input_size, output_size):
-        self.weights = np.random.randn(input_size, output_size) * 0.01
-        self.h_bias = np.zeros(output_size)
-        self.v_bias = np.zeros(input_size)
+    def __init__(self, input_size, output_size, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.weights = (self.rng.standard_normal((input_size, output_size)) * 0.01).astype(np.float32)
+        self.h_bias = np.zeros(output_size, dtype=np.float32)
+        self.v_bias = np.zeros(input_size, dtype=np.float32)
 
-    def train(self, data, epochs, learning_rate):
-        # Placeholder for training method
-        pass
+    def train(self, data, epochs, learning_rate, packed=False, batch_size=64):
+        # Mini-batch CD-1, reading shuffled batches so the data is never copied as a whole
+        num_samples = data.shape[0]
+        for epoch in range(epochs):
+            order = self.rng.permutation(num_samples)
+            for start in range(0, num_samples, batch_size):
+                v0 = read_rows(data, order[start:start + batch_size], self.weights.shape[0], packed, np.float32)
+
+                # Positive phase, one Gibbs step, negative phase
+                h0_probs = self.hidden_probabilities(v0)
+                v1 = self.sample_visible(self._sample(h0_probs))
+                h1_probs = self.hidden_probabilities(v1)
+
+                # Update weights and biases from the batch averaged statistics
+                scale = learning_rate / v0.shape[0]
+                self.weights += scale * (v0.T @ h0_probs - v1.T @ h1_probs)
+                self.v_bias += scale * (v0.sum(axis=0) - v1.sum(axis=0))
+                self.h_bias += scale * (h0_probs.sum(axis=0) - h1_probs.sum(axis=0))
+
+    def hidden_probabilities(self, visible):
+        return self._sigmoid(visible @ self.weights + self.h_bias)
+
+    def visible_probabilities(self, hidden):
+        return self._sigmoid(hidden @ self.weights.T + self.v_bias)
 
     def sample_hidden(self, visible):
-        # Placeholder for sampling hidden layer
-        return np.random.randint(2, size=self.weights.shape[1])
+        # Sample the hidden layer for one state vector or a batch of them
+        return self._sample(self.hidden_probabilities(visible))
 
     def sample_visible(self, hidden):
-        # Placeholder for sampling visible layer
-        return np.random.randint(2, size=self.weights.shape[0])
+        # Sample the visible layer for one state vector or a batch of them
+        return self._sample(self.visible_probabilities(hidden))
+
+    def _sample(self, probs):
+        return (probs > self.rng.random(probs.shape, dtype=np.float32)).astype(np.float32)
+
+    def _sigmoid(self, x):
+        return 1 / (1 + np.exp(-x))
 
 # Stacked Restricted Boltzmann Machine Class
 class StackedRBM:
-    def __init__(self, sizes):
-        self.rbms = [RBM(sizes[i], sizes[i + 1]) for i in range(len(sizes) - 1)]
+    def __init__(self, sizes, seed=None):
+        rng = np.random.default_rng(seed)
+        self.rbms = [RBM(sizes[i], sizes[i + 1], rng) for i in range(len(sizes) - 1)]
 
-    def train(self, data, epochs, learning_rate):
+    def train(self, data, epochs, learning_rate, packed=False, batch_size=64, chunk_size=4096, buffer_dir=None):
+        # Greedy layer-wise pretraining. Between layers the hidden probabilities are
+        # computed chunk by chunk into one preallocated buffer (memory-mapped when
+        # buffer_dir is given), and the previous buffer is released once it is consumed.
         input_data = data
-        for rbm in self.rbms:
-            rbm.train(input_data, epochs, learning_rate)
-            input_data = np.array([rbm.sample_hidden(sample) for sample in input_data])
+        for i, rbm in enumerate(self.rbms):
+            # Only the input data can be bit-packed, hidden layers are propagated densely
+            layer_packed = packed and i == 0
+            start = time.perf_counter()
+            rbm.train(input_data, epochs, learning_rate, packed=layer_packed, batch_size=batch_size)
+            train_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            path = None if buffer_dir is None else os.path.join(buffer_dir, f'rbm_layer_{i + 1}.npy')
+            input_data, error = propagate(rbm, input_data, layer_packed, chunk_size, path)
+            propagate_time = time.perf_counter() - start
+            print(f"Layer {i + 1} ({rbm.weights.shape[0]} -> {rbm.weights.shape[1]}): "
+                  f"trained in {train_time:.1f}s, propagated in {propagate_time:.1f}s, "
+                  f"reconstruction error {error:.4f}")
+        return input_data
+
+    def save(self, path):
+        # One .npy file per layer parameter plus the layer sizes and RNG state
+        arrays = {}
+        for i, rbm in enumerate(self.rbms):
+            arrays[f'layer_{i}_weights'] = rbm.weights
+            arrays[f'layer_{i}_h_bias'] = rbm.h_bias
+            arrays[f'layer_{i}_v_bias'] = rbm.v_bias
+        sizes = [self.rbms[0].weights.shape[0]] + [rbm.weights.shape[1] for rbm in self.rbms]
+        save_checkpoint(path, arrays, {'sizes': sizes, 'rng_state': self.rbms[0].rng.bit_generator.state})
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        # Memory-map every layer (read-only by default, 'c' or None to keep training)
+        state, arrays = load_checkpoint(path, mmap_mode)
+        stacked = cls.__new__(cls)  # Skip the random initialization
+        rng = restore_rng(state['rng_state'])
+        stacked.rbms = []
+        for i in range(len(state['sizes']) - 1):
+            rbm = RBM.__new__(RBM)
+            rbm.rng = rng
+            rbm.weights = arrays[f'layer_{i}_weights']
+            rbm.h_bias = arrays[f'layer_{i}_h_bias']
+            rbm.v_bias = arrays[f'layer_{i}_v_bias']
+            stacked.rbms.append(rbm)
+        return stacked
+
+# Propagate data through a trained RBM chunk by chunk into a single output buffer
+def propagate(rbm, data, packed=False, chunk_size=4096, path=None):
+    num_samples = data.shape[0]
+    num_visible, num_hidden = rbm.weights.shape
+    if path is None:
+        hidden = np.empty((num_samples, num_hidden), dtype=np.float32)
+    else:
+        hidden = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(num_samples, num_hidden))
+
+    # Accumulate the squared reconstruction error alongside the propagation
+    squared_error = 0.0
+    for start in range(0, num_samples, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, num_samples))
+        visible = read_rows(data, rows, num_visible, packed, np.float32)
+        hidden_probs = rbm.hidden_probabilities(visible)
+        hidden[start:start + len(rows)] = hidden_probs
+        reconstruction = rbm.visible_probabilities(hidden_probs)
+        squared_error += float(np.sum((visible - reconstruction) ** 2))
+    return hidden, squared_error / (num_samples * num_visible)
 
 # Load MNIST Data
 (x_train, _), (_, _) = mnist.load_data()
-x_train = x_train.astype('float32') / 255.0
-x_train = x_train.reshape(-1, 784)  # Flatten the images
+# Binarize the raw uint8 pixels straight into 98 bytes per image instead of
+# materializing a float32 copy of all 60k images
+x_train = pack_binary_dataset(x_train.reshape(-1, 784), os.path.join(tempfile.gettempdir(), 'mnist_packed.npy'),
+                              threshold=127)
 
 # Initialize and Train Stacked RBM
 sizes = [784, 512, 256]  # Example layer sizes
 stacked_rbm = StackedRBM(sizes)
-stacked_rbm.train(x_train, epochs=10, learning_rate=0.01)
+stacked_rbm.train(x_train, epochs=10, learning_rate=0.01, packed=True)
+
+# Save the trained stack so inference workers can memory-map it instead of retraining
+checkpoint_dir = os.path.join(tempfile.gettempdir(), 'stacked_rbm_checkpoint')
+stacked_rbm.save(checkpoint_dir)
+stacked_rbm = StackedRBM.load(checkpoint_dir)
 
 # Visualization (Optional)
 # Visualize weights of the first RBM
@@ -0,0 +1,121 @@
+import json
+import os
+import numpy as np
+
+
+def save_checkpoint(path, arrays, state):
+    """
+    Write a checkpoint directory: one .npy file per array plus state.json.
+
+    Plain .npy files can be memory-mapped at load time, so processes that
+    load the same checkpoint share its pages instead of holding copies.
+    An .npz archive cannot be memory-mapped, which is why it is not used.
+
+    Parameters:
+    path : str
+        Checkpoint directory, created when missing.
+    arrays : dict
+        Arrays keyed by name; each one is written to <name>.npy.
+    state : dict
+        JSON-serializable hyperparameters and generator state.
+    """
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + '.npy'), np.ascontiguousarray(array))
+    state = dict(state, arrays=sorted(arrays))
+    with open(os.path.join(path, 'state.json'), 'w') as f:
+        json.dump(state, f)
+
+
+def load_checkpoint(path, mmap_mode='r'):
+    """
+    Read a checkpoint directory written by save_checkpoint.
+
+    Parameters:
+    path : str
+        Checkpoint directory.
+    mmap_mode : str or None, optional
+        np.load mmap_mode for the arrays: 'r' read-only, 'c' copy-on-write,
+        None to read them into memory. Default is 'r'.
+
+    Returns:
+    tuple
+        The state dictionary and the arrays keyed by name.
+    """
+    with open(os.path.join(path, 'state.json')) as f:
+        state = json.load(f)
+    arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode) for name in state['arrays']}
+    return state, arrays
+
+
+def restore_rng(rng_state):
+    # Rebuild a Generator with the exact bit generator state that was saved
+    rng = np.random.Generator(getattr(np.random, rng_state['bit_generator'])())
+    rng.bit_generator.state = rng_state
+    return rng
+
+
+def read_rows(data, rows, num_visible, packed=False, dtype=np.float64):
+    """
+    Read a set of data rows as a dense (rows x visible) array.
+
+    Only the requested rows are read, so data can be an np.memmap far
+    larger than memory. Rows are fetched in sorted order for sequential
+    disk access, then put back into the requested order.
+
+    Parameters:
+    data : numpy.ndarray or numpy.memmap
+        Binary data with shape (samples x visible), or bit-packed rows
+        with shape (samples x ceil(visible / 8)) from pack_binary_dataset.
+    rows : numpy.ndarray
+        Row indices to read.
+    num_visible : int
+        Number of visible units, used to drop the padding bits of packed rows.
+    packed : bool, optional
+        Whether data holds np.packbits rows. Default is False.
+    dtype : numpy dtype, optional
+        Dtype of the returned rows. Default is np.float64.
+
+    Returns:
+    numpy.ndarray
+        The rows, unpacked when needed, with shape (len(rows) x visible).
+    """
+    order = np.argsort(rows)
+    block = np.empty((len(rows),) + data.shape[1:], dtype=data.dtype)
+    block[order] = data[rows[order]]
+    if packed:
+        block = np.unpackbits(block, axis=1, count=num_visible)
+    return block.astype(dtype, copy=False)
+
+
+def pack_binary_dataset(data, path, threshold=0.5, chunk_size=65536):
+    """
+    Binarize a data set and store it bit-packed in a memory-mapped .npy file.
+
+    The data is processed chunk by chunk, so neither the input nor the
+    output has to fit in memory. Eight visible units are stored per byte.
+
+    Parameters:
+    data : numpy.ndarray or numpy.memmap
+        Data with shape (samples x visible).
+    path : str
+        Output .npy file.
+    threshold : float, optional
+        Values above the threshold become 1. Default is 0.5.
+    chunk_size : int, optional
+        Rows processed at a time. Default is 65536.
+
+    Returns:
+    numpy.memmap
+        Read-only packed rows with shape (samples x ceil(visible / 8)), to be
+        passed to the trainers with packed=True.
+    """
+    num_samples, num_visible = data.shape
+    packed = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                       shape=(num_samples, (num_visible + 7) // 8))
+    for start in range(0, num_samples, chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size])
+        packed[start:start + chunk_size] = np.packbits(chunk > threshold, axis=1)
+    packed.flush()
+    del packed
+    return np.load(path, mmap_mode='r')